@@ -1,13 +1,28 @@
 
+import asyncio
+import json
 import uvicorn
 from fastapi import FastAPI, Body
-from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
 from selenium import webdriver
 import os
 
 from providers.french_stream import FrenchStreamProvider
 from providers.papadustream import PapaduStreamProvider
 from providers.flemmix import FlemmixProvider
+from cache import SQLiteBackend, configure_cache, configure_search_cache, get_cache
+from scraping.aggregate import merge_results, search_all
+from scraping.crawl import configure_crawler
+from scraping.executor import configure_executor, run_scraping, shutdown_executor
+from scraping.http import configure_http_client, get_http_client
+from scraping.jobs import PRIORITY_NORMAL, configure_job_queue, get_job_queue
+from scraping.metrics import register_cache_metrics, register_pool_metrics, render_metrics
+from scraping.pool import DriverPool
+from scraping.prewarm import Prewarmer
+from scraping.resolver import configure_resolver
+from scraping.session import configure_session_pool, get_session_pool
+from scraping.strategy import configure_strategy_memory, get_strategy_memory
 import undetected_chromedriver as uc
 import dotenv
 
@@ -21,28 +36,137 @@ LATEST_RELEASE_VERSION = os.getenv("LATEST_RELEASE_VERSION", "unknown")
 
 
 # --- Selenium WebDriver Setup ---
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--headless")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--disable-gpu")
-# driver = webdriver.Chrome(
-#     service=ChromeService(ChromeDriverManager().install()), options=chrome_options
-# )
+def create_driver() -> uc.Chrome:
+    """Start a new headless Chrome instance for the driver pool."""
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    # driver = webdriver.Chrome(
+    #     service=ChromeService(ChromeDriverManager().install()), options=chrome_options
+    # )
+    return uc.Chrome(options=chrome_options)
 
 
-driver = uc.Chrome(options=chrome_options)
+driver_pool = DriverPool(
+    create_driver,
+    min_size=int(os.getenv("DRIVER_POOL_MIN_SIZE", 1)),
+    max_size=int(os.getenv("DRIVER_POOL_MAX_SIZE", 3)),
+    max_navigations=int(os.getenv("DRIVER_POOL_MAX_NAVIGATIONS", 200)),
+)
+
+# One scraping thread per browser: extra threads would only queue on the pool.
+configure_executor(
+    int(os.getenv("SCRAPING_WORKERS", driver_pool.max_size)),
+    fanout_workers=int(os.getenv("SCRAPING_FANOUT_WORKERS", 16)),
+)
+
+# Episode pages of a season crawled at once, each with its own browser
+configure_crawler(int(os.getenv("EPISODE_CRAWL_WORKERS", driver_pool.max_size)))
+
+# HTTP sessions shared by the providers of each site
+configure_session_pool(pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 16)))
+
+# Async HTTP client shared by everything that talks to player hosts
+configure_http_client(
+    http2=os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes"),
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+    max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", 20)),
+    per_host=int(os.getenv("HTTP_PER_HOST_CONCURRENCY", 8)),
+    timeout=float(os.getenv("HTTP_TIMEOUT", 10)),
+    retries=int(os.getenv("HTTP_RETRIES", 2)),
+    dns_ttl=float(os.getenv("HTTP_DNS_TTL", 300)),
+)
+
+configure_resolver(
+    concurrency=int(os.getenv("UQLOAD_CONCURRENCY", 8)),
+    per_host=int(os.getenv("UQLOAD_PER_HOST_CONCURRENCY", 4)),
+    timeout=float(os.getenv("UQLOAD_TIMEOUT", 30)),
+    # Mirror hosts tried in order when a link's own host fails
+    mirrors=[host.strip() for host in os.getenv(
+        "UQLOAD_MIRRORS", "uqload.cx,uqload.net,uqload.io,uqload.co").split(",") if host.strip()],
+    info_ttl=float(os.getenv("UQLOAD_INFO_TTL", 3600)),
+)
+
+# Persist video links on disk so restarts and deploys don't start cold
+cache_backend = None
+if os.getenv("VIDEO_CACHE_BACKEND", "sqlite") == "sqlite":
+    cache_backend = SQLiteBackend(
+        os.getenv("VIDEO_CACHE_PATH", os.path.join(".cache", "video_cache.sqlite3"))
+    )
+
+# Search URL patterns and selectors that worked last, kept across restarts
+configure_strategy_memory(
+    os.getenv("SEARCH_STRATEGY_PATH", os.path.join(".cache", "search_strategies.json"))
+)
 
 # Initialize providers
 providers = {
-    "papadustream": PapaduStreamProvider(driver),
-    "french-stream": FrenchStreamProvider(driver),
-    "flemmix": FlemmixProvider(driver),
+    "papadustream": PapaduStreamProvider(driver_pool),
+    "french-stream": FrenchStreamProvider(driver_pool),
+    "flemmix": FlemmixProvider(driver_pool),
 }
 
+# Per-provider TTL overrides, e.g. VIDEO_CACHE_TTL_FRENCH_STREAM=7200.
+# The cache keys entries by provider class name.
+provider_ttls = {}
+for name, provider in providers.items():
+    ttl = os.getenv(f"VIDEO_CACHE_TTL_{name.upper().replace('-', '_')}")
+    if ttl:
+        provider_ttls[type(provider).__name__] = int(ttl)
+
+configure_cache(
+    backend=cache_backend,
+    ttl=int(os.getenv("VIDEO_CACHE_TTL", 3600)),
+    max_entries=int(os.getenv("VIDEO_CACHE_MAX_ENTRIES", 1024)),
+    max_bytes=int(os.getenv("VIDEO_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    stale_ttl=int(os.getenv("VIDEO_CACHE_STALE_TTL", 900)),
+    empty_ttl=int(os.getenv("VIDEO_CACHE_EMPTY_TTL", 300)),
+    failure_ttl=int(os.getenv("VIDEO_CACHE_FAILURE_TTL", 60)),
+    provider_ttls=provider_ttls,
+)
+
+# Search results are only cached when enabled, and briefly
+configure_search_cache(
+    enabled=os.getenv("SEARCH_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    ttl=int(os.getenv("SEARCH_CACHE_TTL", 300)),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 512)),
+    prefix_match=os.getenv("SEARCH_CACHE_PREFIX_MATCH", "false").lower() in ("1", "true", "yes"),
+)
+
+# Cache and pool figures are read from their stats() on each scrape
+register_cache_metrics(lambda: get_cache().stats())
+register_pool_metrics(driver_pool.stats)
+
+# Batch /get-videos jobs, resolved as many at once as there are drivers
+configure_job_queue(
+    providers,
+    concurrency=int(os.getenv("JOB_QUEUE_CONCURRENCY", driver_pool.max_size)),
+    retention=float(os.getenv("JOB_RETENTION", 3600)),
+    max_jobs=int(os.getenv("JOB_MAX_JOBS", 1000)),
+)
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", 200))
+
+# Keeps the most requested video links fresh in the background
+prewarmer = None
+if os.getenv("PREWARM_ENABLED", "true").lower() in ("1", "true", "yes"):
+    prewarmer = Prewarmer(
+        providers,
+        driver_pool,
+        top_k=int(os.getenv("PREWARM_TOP_K", 20)),
+        lead_time=float(os.getenv("PREWARM_LEAD_TIME", 300)),
+        interval=float(os.getenv("PREWARM_INTERVAL", 60)),
+        min_requests=float(os.getenv("PREWARM_MIN_REQUESTS", 3)),
+        rate_per_minute=float(os.getenv("PREWARM_RATE_PER_MINUTE", 4)),
+    )
+
 # Default provider
 default_provider = "french-stream"
 
+# Seconds each provider gets to answer a search across all providers
+SEARCH_ALL_DEADLINE = float(os.getenv("SEARCH_ALL_DEADLINE", 10))
+
 
 # --- FastAPI App ---
 app = FastAPI(
@@ -72,17 +196,42 @@ async def search(query: str, provider_name: str = default_provider):
 
     - **query**: The search term (e.g., "The Matrix", "La Casa de Papel").
     - **provider_name**: The provider to use (papadustream, french-stream, or flemmix). Default is flemmix.
+      `*` searches all providers, like `/search/all`.
     """
+    if provider_name == "*":
+        return await search_all_providers(query)
     if provider_name not in providers:
         return {
             "error": f"Invalid provider. Available providers: {', '.join(providers.keys())}"
         }
 
     provider = providers[provider_name]
-    search_results = await run_in_threadpool(provider.search_media, query)
+    search_results = await run_scraping(provider.search_media, query)
     return {"results": [media.to_dict() for media in search_results]}
 
 
+@app.get("/search/all", summary="Search for media on every provider")
+async def search_all_providers(query: str, deadline: float | None = None):
+    """
+    Searches all providers at once and merges their results.
+
+    - **query**: The search term.
+    - **deadline**: Seconds each provider has to answer (default
+      `SEARCH_ALL_DEADLINE`). A provider that misses it is reported as
+      `timeout` and the others are returned without it.
+
+    Results with the same normalized title on several sites are merged:
+    `provider` is the site the entry is taken from and `sources` lists every
+    site (and its URL) that has it.
+    """
+    deadline = SEARCH_ALL_DEADLINE if deadline is None or deadline <= 0 else deadline
+    outcomes = await search_all(providers, query, deadline)
+    return {
+        "results": merge_results(outcomes),
+        "providers": {outcome.name: outcome.to_dict() for outcome in outcomes},
+    }
+
+
 @app.post("/get-videos", summary="Get video links from a media URL")
 async def get_videos(
     media_url: str = Body(..., embed=True,
@@ -103,6 +252,169 @@ async def get_videos(
     return {"results": [video.to_dict() for video in video_results]}
 
 
+@app.post("/get-videos/stream", summary="Stream video links from a media URL")
+async def get_videos_stream(
+    media_url: str = Body(..., embed=True,
+                          description="The URL of the media page from a search result."),
+    provider_name: str = Body(default_provider, embed=True,
+                              description="The provider name (papadustream, french-stream, or flemmix)."),
+    format: str = Body("ndjson", embed=True,
+                       description="ndjson (one JSON video per line) or sse (server-sent events)."),
+):
+    """
+    Same as /get-videos, but sends each video as soon as it resolves instead
+    of waiting for the whole season.
+
+    - **ndjson**: one `UqVideo` JSON object per line; a line with an `error`
+      key reports a failure after the videos sent so far.
+    - **sse**: `video` events with a `UqVideo` as data, then a `done` event
+      (or an `error` event).
+    """
+    if provider_name not in providers:
+        return {
+            "error": f"Invalid provider. Available providers: {', '.join(providers.keys())}"
+        }
+    if format not in ("ndjson", "sse"):
+        return {"error": "Invalid format. Available formats: ndjson, sse"}
+
+    provider = providers[provider_name]
+
+    async def ndjson():
+        try:
+            async for video in provider.iter_uqvideos_from_media_url(media_url):
+                yield json.dumps(video.to_dict()) + "\n"
+        except Exception as exc:
+            yield json.dumps({"error": str(exc)}) + "\n"
+
+    async def sse():
+        count = 0
+        try:
+            async for video in provider.iter_uqvideos_from_media_url(media_url):
+                count += 1
+                yield f"event: video\ndata: {json.dumps(video.to_dict())}\n\n"
+        except Exception as exc:
+            yield f"event: error\ndata: {json.dumps({'error': str(exc)})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'count': count})}\n\n"
+
+    if format == "sse":
+        return StreamingResponse(
+            sse(), media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return StreamingResponse(
+        ndjson(), media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+class BatchItem(BaseModel):
+    media_url: str
+    provider_name: str = default_provider
+
+
+@app.post("/get-videos/batch", summary="Queue video link lookups for many media URLs")
+async def get_videos_batch(
+    items: list[BatchItem] = Body(..., embed=True,
+                                  description="The media pages to resolve, with their provider."),
+    priority: int = Body(PRIORITY_NORMAL, embed=True,
+                         description="Queue priority; lower runs first (0 high, 10 normal, 20 low)."),
+):
+    """
+    Queues many media pages at once and returns a job id right away.
+
+    Items run through a shared queue, most urgent job first, with at most
+    `JOB_QUEUE_CONCURRENCY` resolving at once. Items already in the video
+    cache are answered without waiting. Follow the job with
+    `GET /jobs/{job_id}` or `GET /jobs/{job_id}/stream`.
+    """
+    if not items:
+        return {"error": "No items"}
+    if len(items) > JOB_MAX_ITEMS:
+        return {"error": f"Too many items (at most {JOB_MAX_ITEMS})"}
+
+    job = get_job_queue().submit(
+        ((item.provider_name, item.media_url) for item in items), priority=priority
+    )
+    return job.to_dict(include_items=False)
+
+
+@app.get("/jobs/{job_id}", summary="Poll a batch job")
+async def get_job(job_id: str):
+    """
+    Returns the status of a batch job and the results of its finished items.
+    Finished jobs are kept for `JOB_RETENTION` seconds.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return {"error": "Unknown job"}
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/stream", summary="Stream the results of a batch job")
+async def stream_job(job_id: str, format: str = "ndjson"):
+    """
+    Sends each item of a batch job as soon as it finishes, then ends.
+
+    - **ndjson**: one item per line, with its `results` or `error`.
+    - **sse**: `item` events, then a `done` event with the job summary.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return {"error": "Unknown job"}
+    if format not in ("ndjson", "sse"):
+        return {"error": "Invalid format. Available formats: ndjson, sse"}
+
+    async def ndjson():
+        async for item in job.completed():
+            yield json.dumps(item.to_dict()) + "\n"
+
+    async def sse():
+        async for item in job.completed():
+            yield f"event: item\ndata: {json.dumps(item.to_dict())}\n\n"
+        yield f"event: done\ndata: {json.dumps(job.to_dict(include_items=False))}\n\n"
+
+    if format == "sse":
+        return StreamingResponse(
+            sse(), media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return StreamingResponse(
+        ndjson(), media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+async def metrics():
+    """
+    Per-provider, per-stage timings and error counts, video cache counters
+    and driver pool utilization, in the Prometheus text format.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/stats/search-strategies", summary="Search strategy hit rates")
+async def search_strategy_stats():
+    """
+    Returns, per provider, the search URL pattern and selectors tried first
+    and the hit rate of every combination tried so far.
+    """
+    return get_strategy_memory().stats()
+
+
+@app.get("/stats/prewarm", summary="Background pre-warming statistics")
+async def prewarm_stats():
+    """
+    Returns how many popular entries the background pre-warmer refreshed,
+    failed or deferred, and how many (provider, media URL) pairs it tracks.
+    """
+    if prewarmer is None:
+        return {"enabled": False}
+    return {"enabled": True, **prewarmer.stats()}
+
+
 @app.get("/latest-release", summary="Get latest release version")
 async def latest_release():
     """
@@ -113,9 +425,28 @@ async def latest_release():
 
 # --- Lifecycle Events ---
 
+@app.on_event("startup")
+def startup_event():
+    get_cache().warm_load()
+    get_cache().start_sweeper()
+    driver_pool.start()
+    if prewarmer is not None:
+        prewarmer.start()
+
+
 @app.on_event("shutdown")
-def shutdown_event():
-    driver.quit()
+async def shutdown_event():
+    if prewarmer is not None:
+        prewarmer.stop()
+    get_cache().stop_sweeper()
+    # Entries still queued for the backend
+    await asyncio.to_thread(get_cache().flush)
+    get_strategy_memory().flush()
+    get_job_queue().close()
+    shutdown_executor(wait=False)
+    get_session_pool().close()
+    await get_http_client().aclose()
+    driver_pool.close()
 
 
 if __name__ == "__main__":
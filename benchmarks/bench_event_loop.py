@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Event-loop latency regression benchmark for ``/get-videos``.
+
+Fires ten concurrent ``/get-videos`` calls at the local stub site while a
+probe task measures how late the event loop wakes up and how long
+``/providers`` takes to answer. Browser-bound work must run on the scraping
+executor, so both stay small no matter how slow the crawls are.
+
+Requires Chrome, like the API itself. Exits with status 1 when the worst
+observed loop lag exceeds the threshold.
+
+Usage:
+    python benchmarks/bench_event_loop.py [--threshold-ms 100] [--calls 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+from cache import get_cache  # noqa: E402
+from benchmarks.stub_site import start_stub_sites  # noqa: E402
+
+PROBE_INTERVAL = 0.01
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """Record how late each ``PROBE_INTERVAL`` sleep wakes up."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(loop.time() - start - PROBE_INTERVAL)
+
+
+async def probe_providers(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]) -> None:
+    """Hit a cheap endpoint repeatedly while the crawls are running."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/providers")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run(calls: int, threshold_ms: float) -> bool:
+    stub = start_stub_sites(page_delay=0.3)
+    # Routes uqload lookups to the stub's proxy
+    os.environ.update(stub.env())
+    get_cache().clear()
+
+    lags: list[float] = []
+    latencies: list[float] = []
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(app=api.app, base_url="http://api", timeout=None) as client:
+        probes = [
+            asyncio.create_task(probe_loop_lag(stop, lags)),
+            asyncio.create_task(probe_providers(client, stop, latencies)),
+        ]
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/get-videos", json={
+                "media_url": f"{stub.url('flemmix')}/serie-en-streaming/30{index:02d}-bench-saison-1.html",
+                "provider_name": "flemmix",
+            })
+            for index in range(calls)
+        ))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await asyncio.gather(*probes)
+
+    stub.close()
+    await api.shutdown_event()
+
+    failed = [response for response in responses if response.status_code != 200]
+    worst_lag_ms = max(lags, default=0.0) * 1000
+    print(f"/get-videos calls:     {calls} in {elapsed:.2f}s ({len(failed)} failed)")
+    print(f"loop lag samples:      {len(lags)}")
+    print(f"loop lag median:       {statistics.median(lags) * 1000:.2f} ms")
+    print(f"loop lag max:          {worst_lag_ms:.2f} ms (threshold {threshold_ms:.0f} ms)")
+    if latencies:
+        print(f"/providers median:     {statistics.median(latencies) * 1000:.2f} ms")
+        print(f"/providers max:        {max(latencies) * 1000:.2f} ms")
+
+    return not failed and worst_lag_ms <= threshold_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--threshold-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.calls, args.threshold_ms))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Search page extraction benchmark on saved fixture HTML.
+
+Measures the per-page time to turn a search result page into ``Media``
+objects:
+
+- snapshot: parse the page source once with lxml and run compiled XPath
+  selectors in-process (what the providers do now)
+- webdriver: the previous per-element ``find_element`` / ``get_attribute``
+  walk, each call being a WebDriver round trip. Only run with ``--browser``
+  since it needs Chrome; the fixture is loaded from a ``file://`` URL.
+
+Usage:
+    python benchmarks/bench_extraction.py [--rounds 50] [--browser]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.media import Media  # noqa: E402
+from providers.flemmix import FlemmixProvider  # noqa: E402
+from providers.papadustream import PapaduStreamProvider  # noqa: E402
+from scraping.extract import parse_html, select  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+FRENCH_STREAM_TILES = (
+    "//div[contains(@class, 'short serie')]",
+    "//div[contains(@class, 'short-in nl')]",
+)
+
+
+# --- Snapshot extraction (current) ---
+
+def snapshot_french_stream(source: str, base_url: str) -> List[Media]:
+    page = parse_html(source, base_url=base_url)
+    tiles = select(page, FRENCH_STREAM_TILES[0]) + select(page, FRENCH_STREAM_TILES[1])
+    return [Media.from_html_element(tile) for tile in tiles[:50]]
+
+
+def snapshot_flemmix(source: str, base_url: str) -> List[Media]:
+    page = parse_html(source, base_url=base_url)
+    return FlemmixProvider._parse_search_results(page, FlemmixProvider.SITE.search_item_xpaths[0])
+
+
+def snapshot_papadustream(source: str, base_url: str) -> List[tuple]:
+    page = parse_html(source, base_url=base_url)
+    return PapaduStreamProvider._parse_series_entries(page)
+
+
+# --- Per-element WebDriver extraction (previous) ---
+
+def webdriver_french_stream(driver) -> List[Media]:
+    tiles = (
+        driver.find_elements("xpath", FRENCH_STREAM_TILES[0])
+        + driver.find_elements("xpath", FRENCH_STREAM_TILES[1])
+    )
+    return [Media.from_web_element(tile) for tile in tiles[:50]]
+
+
+def webdriver_flemmix(driver) -> List[Media]:
+    medias = []
+    for elem in driver.find_elements("xpath", FlemmixProvider.SITE.search_item_xpaths[0])[:50]:
+        title = None
+        for title_xpath in FlemmixProvider.SITE.search_title_xpaths:
+            try:
+                title_elem = elem.find_element("xpath", title_xpath)
+                title = title_elem.text.strip() or title_elem.get_attribute("title")
+                if title:
+                    break
+            except Exception:
+                continue
+        url = None
+        for url_xpath in FlemmixProvider.SITE.search_url_xpaths:
+            try:
+                url = elem.find_element("xpath", url_xpath).get_attribute("href")
+                if url:
+                    break
+            except Exception:
+                continue
+        img = elem.find_element("xpath", ".//img")
+        image_url = img.get_attribute("data-src") or img.get_attribute("src")
+        medias.append(Media(title=title, url=url, image_url=image_url))
+    return medias
+
+
+def webdriver_papadustream(driver) -> List[tuple]:
+    entries = []
+    for tile in driver.find_elements("xpath", PapaduStreamProvider._SERIES_TILE_XPATH):
+        title_el = tile.find_element("xpath", ".//div[contains(@class,'short_title')]/a")
+        img = tile.find_element("xpath", ".//img")
+        entries.append((
+            title_el.text.strip(),
+            title_el.get_attribute("href"),
+            img.get_attribute("data-src") or img.get_attribute("src"),
+        ))
+    return entries
+
+
+CASES = [
+    ("french_stream_search.html", snapshot_french_stream, webdriver_french_stream),
+    ("flemmix_search.html", snapshot_flemmix, webdriver_flemmix),
+    ("papadustream_search.html", snapshot_papadustream, webdriver_papadustream),
+]
+
+
+def measure(func: Callable[[], list], rounds: int) -> tuple[float, int]:
+    """Median milliseconds per call and the number of items extracted."""
+    timings = []
+    items = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        items = len(func())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, items
+
+
+def create_driver():
+    import undetected_chromedriver as uc
+
+    chrome_options = uc.ChromeOptions()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    return uc.Chrome(options=chrome_options)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--browser", action="store_true",
+                        help="also measure per-element WebDriver extraction (needs Chrome)")
+    args = parser.parse_args()
+
+    driver = create_driver() if args.browser else None
+    try:
+        print(f"{'fixture':<28}{'items':>6}{'snapshot ms':>14}{'webdriver ms':>15}{'speedup':>10}")
+        for name, snapshot, per_element in CASES:
+            path = FIXTURES / name
+            source = path.read_text(encoding="utf-8")
+            base_url = path.as_uri()
+
+            after, items = measure(lambda: snapshot(source, base_url), args.rounds)
+
+            before = None
+            if driver is not None:
+                driver.get(base_url)
+                before, _ = measure(lambda: per_element(driver), max(1, args.rounds // 10))
+
+            before_col = f"{before:>15.2f}" if before is not None else f"{'-':>15}"
+            speedup_col = f"{before / after:>9.1f}x" if before is not None else f"{'-':>10}"
+            print(f"{name:<28}{items:>6}{after:>14.3f}{before_col}{speedup_col}")
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
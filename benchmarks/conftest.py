@@ -0,0 +1,99 @@
+"""
+Offline benchmark suite.
+
+Starts the stub sites of `benchmarks/stub_site.py` and points the providers
+and uqload at them before the API is imported, so nothing leaves the
+machine. Benchmarks that need a browser (the pages the providers only read
+through Chrome) are skipped when Chrome is not installed.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks/ --benchmark-only
+"""
+
+import asyncio
+import os
+import resource
+import shutil
+import sys
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_site import start_stub_sites  # noqa: E402
+
+# Provider base URLs are read when the providers are imported
+STUB = start_stub_sites()
+os.environ.update(STUB.env())
+os.environ["VIDEO_CACHE_BACKEND"] = "memory"
+os.environ["SEARCH_STRATEGY_PATH"] = ""
+os.environ["PREWARM_ENABLED"] = "false"
+
+import api  # noqa: E402
+from cache import get_cache, get_search_cache  # noqa: E402
+
+# Read by the HTTP fetch tier; otherwise it takes a browser to learn it
+STUB_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+)
+
+HAS_BROWSER = any(
+    shutil.which(name)
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")
+)
+requires_browser = pytest.mark.skipif(not HAS_BROWSER, reason="needs Chrome")
+
+
+@pytest.fixture(scope="session")
+def stub():
+    yield STUB
+    STUB.close()
+
+
+@pytest.fixture(scope="session")
+def app():
+    for provider in api.providers.values():
+        if hasattr(provider, "_user_agent"):
+            provider._user_agent = STUB_USER_AGENT
+    if HAS_BROWSER:
+        api.startup_event()
+    yield api.app
+    asyncio.run(api.shutdown_event())
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    get_cache().clear()
+    if get_search_cache() is not None:
+        get_search_cache().clear()
+
+
+def call_api(app, method: str, path: str, **kwargs) -> httpx.Response:
+    """Send one request to the ASGI app from a fresh event loop."""
+    return asyncio.run(_call_api(app, method, path, **kwargs))
+
+
+async def _call_api(app, method: str, path: str, **kwargs) -> httpx.Response:
+    async with httpx.AsyncClient(app=app, base_url="http://api", timeout=None) as client:
+        return await client.request(method, path, **kwargs)
+
+
+def measure_memory(func: Callable[[], Any]) -> Tuple[Any, int]:
+    """Run ``func`` under tracemalloc; returns its result and the peak bytes allocated."""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def max_rss_kib() -> int:
+    """Peak resident set size of this process so far (KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
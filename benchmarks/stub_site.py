@@ -0,0 +1,291 @@
+"""
+Local stub streaming sites used by the benchmarks.
+
+Replays the pages saved in ``benchmarks/fixtures/`` from background threads,
+one server per provider so each site lives at the root of its own origin:
+
+- flemmix: ``/search/<q>``, ``/serie-en-streaming/<slug>.html`` (lists
+  ``episodes`` episodes) and ``/serie-en-streaming/<slug>/episode-<k>.html``
+- papadustream: ``/f/<filters>/`` (search), ``/serie/<slug>.html`` (lists
+  ``SEASONS`` seasons), ``/serie/<slug>/<n>-saison.html`` and
+  ``/serie/<slug>/<n>-saison/<k>-episode.html``
+- french-stream: ``/search/<q>`` and ``/s-tv/<slug>.html``
+
+Episode and media pages embed ``http://uqload.stub/embed-<code>.html``
+players. That host only exists behind the stub's HTTP proxy, which serves the
+embed page, the video page and a ``HEAD`` on the ``v.mp4`` file, so
+``scraping.uqload_info`` resolves videos without touching the network once the
+variables from :meth:`StubSites.env` are set.
+
+Site pages are answered after ``page_delay`` seconds and uqload requests
+after ``uqload_delay`` seconds, to mimic slow sites.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+SITES = ("flemmix", "papadustream", "french-stream")
+# Provider base URL variables, see the providers' BASE_URL
+BASE_URL_VARIABLES = {
+    "flemmix": "FLEMMIX_BASE_URL",
+    "papadustream": "PAPADUSTREAM_BASE_URL",
+    "french-stream": "FRENCH_STREAM_BASE_URL",
+}
+UQLOAD_HOST = "uqload.stub"
+UQLOAD_URL = f"http://{UQLOAD_HOST}"
+
+EPISODES = 6
+SEASONS = 3
+PAGE_DELAY = 0.05
+UQLOAD_DELAY = 0.02
+VIDEO_SIZE = 734003200
+
+# One media page of each site, as found in its search fixture
+MEDIA_PATHS = {
+    "flemmix": "/serie-en-streaming/3001-arcane-saison-2.html",
+    "papadustream": "/serie/4000-dark/1-saison.html",
+    "french-stream": "/s-tv/1000-vikings---saison-1.html",
+}
+
+_TEMPLATE_RE = re.compile(r"\{\{(\w+)\}\}")
+_fixtures: Dict[str, str] = {}
+
+
+def render(name: str, **values) -> str:
+    """A fixture with its ``{{name}}`` placeholders filled in."""
+    source = _fixtures.get(name)
+    if source is None:
+        source = _fixtures[name] = (FIXTURES / name).read_text(encoding="utf-8")
+    values.setdefault("uqload", UQLOAD_URL)
+    return _TEMPLATE_RE.sub(lambda match: str(values.get(match.group(1), "")), source)
+
+
+def file_code(*parts) -> str:
+    """The 12-character uqload file code of a page, stable across runs."""
+    return hashlib.sha1("/".join(map(str, parts)).encode()).hexdigest()[:12]
+
+
+def _title(slug: str) -> str:
+    # "3001-arcane-saison-2" -> "Arcane saison 2"
+    name = slug.split("-", 1)[-1].replace("---", " - ").replace("-", " ")
+    return name[:1].upper() + name[1:]
+
+
+# --- Site routes: (path regex, handler returning the page) ---
+
+def _flemmix_series(stub: "StubSites", slug: str) -> str:
+    episodes = "\n".join(
+        f'        <div class="episode-item"><a href="/serie-en-streaming/{slug}/episode-{k}.html">'
+        f"Episode {k}</a></div>"
+        for k in range(1, stub.episodes + 1)
+    )
+    return render("flemmix_series.html", id=slug.split("-", 1)[0], title=_title(slug),
+                  episodes=episodes)
+
+
+def _flemmix_episode(stub: "StubSites", slug: str, episode: str) -> str:
+    return render("flemmix_episode.html", title=_title(slug), episode=episode,
+                  code=file_code("flemmix", slug, episode))
+
+
+def _papadustream_series(stub: "StubSites", slug: str) -> str:
+    seasons = "\n".join(
+        f'      <a href="/serie/{slug}/{n}-saison.html" title="Saison {n}">Saison {n}</a>'
+        for n in range(1, SEASONS + 1)
+    )
+    return render("papadustream_series.html", id=slug.split("-", 1)[0], title=_title(slug),
+                  seasons=seasons)
+
+
+def _papadustream_season(stub: "StubSites", slug: str, season: str) -> str:
+    episodes = "\n".join(
+        f'      <a href="/serie/{slug}/{season}-saison/{k}-episode.html">Episode {k}</a>'
+        for k in range(1, stub.episodes + 1)
+    )
+    return render("papadustream_season.html", title=_title(slug), season=season,
+                  episodes=episodes)
+
+
+def _papadustream_episode(stub: "StubSites", slug: str, season: str, episode: str) -> str:
+    return render("papadustream_episode.html", title=_title(slug), season=season,
+                  episode=episode, code=file_code("papadustream", slug, season, episode))
+
+
+def _french_stream_media(stub: "StubSites", slug: str) -> str:
+    return render("french_stream_media.html", title=_title(slug),
+                  code=file_code("french-stream", slug, "vf"),
+                  code2=file_code("french-stream", slug, "vostfr"))
+
+
+ROUTES: Dict[str, Tuple[Tuple[re.Pattern, Callable[..., str]], ...]] = {
+    "flemmix": (
+        (re.compile(r"^/search/[^/]+$"), lambda stub: render("flemmix_search.html")),
+        (re.compile(r"^/(?:serie|film)-en-streaming/([\w-]+)\.html$"), _flemmix_series),
+        (re.compile(r"^/serie-en-streaming/([\w-]+)/episode-(\d+)\.html$"), _flemmix_episode),
+    ),
+    "papadustream": (
+        (re.compile(r"^/f/.+$"), lambda stub: render("papadustream_search.html")),
+        (re.compile(r"^/serie/([\w-]+)\.html$"), _papadustream_series),
+        (re.compile(r"^/serie/([\w-]+)/(\d+)-saison\.html$"), _papadustream_season),
+        (re.compile(r"^/serie/([\w-]+)/(\d+)-saison/(\d+)-episode\.html$"), _papadustream_episode),
+    ),
+    "french-stream": (
+        (re.compile(r"^/search/[^/]+$"), lambda stub: render("french_stream_search.html")),
+        (re.compile(r"^/s-tv/([\w-]+)\.html$"), _french_stream_media),
+    ),
+}
+
+_UQLOAD_EMBED_RE = re.compile(r"^/embed-([a-zA-Z0-9]{12})\.html$")
+_UQLOAD_PAGE_RE = re.compile(r"^/([a-zA-Z0-9]{12})\.html$")
+_UQLOAD_VIDEO_RE = re.compile(r"^/[a-zA-Z0-9]+/v\.mp4$")
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """Serves one site; requests proxied for ``uqload.stub`` go to the uqload stub."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let keep-alive
+    # clients wait on delayed ACKs between them
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def _dispatch(self, head: bool) -> None:
+        stub: StubSites = self.server.stub
+        # A proxied request carries the absolute URL
+        target = urllib.parse.urlsplit(self.path)
+        host = (target.hostname or self.headers.get("Host", "")).split(":")[0]
+        path = urllib.parse.unquote(target.path or "/")
+        if target.query:
+            path = f"{path}?{target.query}"
+
+        if host == UQLOAD_HOST:
+            time.sleep(stub.uqload_delay)
+            self._uqload(path, head)
+            return
+
+        for pattern, handler in ROUTES.get(self.server.site, ()):
+            match = pattern.match(path)
+            if match:
+                time.sleep(stub.page_delay)
+                self._send(handler(stub, *match.groups()), head=head)
+                return
+        self._not_found()
+
+    def _uqload(self, path: str, head: bool) -> None:
+        path = path.split("?")[0]
+        match = _UQLOAD_EMBED_RE.match(path)
+        if match:
+            code = match.group(1)
+            self._send(render("uqload_embed.html", code=code, hash=file_code("video", code),
+                              title=f"Video {code}"), head=head)
+            return
+        match = _UQLOAD_PAGE_RE.match(path)
+        if match:
+            code = match.group(1)
+            self._send(render("uqload_page.html", code=code, title=f"Video {code}"), head=head)
+            return
+        if _UQLOAD_VIDEO_RE.match(path) and head:
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(VIDEO_SIZE))
+            self.end_headers()
+            return
+        self._not_found()
+
+    def _send(self, body: str, head: bool = False) -> None:
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def _not_found(self) -> None:
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSites:
+    """The running stub servers and the environment pointing the API at them."""
+
+    def __init__(self, page_delay: float, uqload_delay: float, episodes: int):
+        self.page_delay = page_delay
+        self.uqload_delay = uqload_delay
+        self.episodes = episodes
+        self.servers: Dict[str, ThreadingHTTPServer] = {}
+
+    def _serve(self, site: str) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubSiteHandler)
+        server.daemon_threads = True
+        server.site = site
+        server.stub = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers[site] = server
+
+    def url(self, site: str) -> str:
+        """Base URL of ``site`` (or of the uqload proxy for "uqload")."""
+        return f"http://127.0.0.1:{self.servers[site].server_port}"
+
+    def media_url(self, site: str) -> str:
+        """A media page of ``site`` that lists uqload videos."""
+        return self.url(site) + MEDIA_PATHS[site]
+
+    def env(self) -> Dict[str, str]:
+        """
+        Environment variables for the API process: provider base URLs, the
+        uqload mirrors, and the proxy that answers for ``uqload.stub``. Both
+        spellings of the proxy variables are set since lower case wins where
+        both exist.
+        """
+        env = {BASE_URL_VARIABLES[site]: self.url(site) for site in SITES}
+        # Mirror fallbacks stay on the stub too
+        env["UQLOAD_MIRRORS"] = UQLOAD_HOST
+        proxy = self.url("uqload")
+        for name, value in (("HTTP_PROXY", proxy), ("NO_PROXY", "127.0.0.1,localhost")):
+            env[name] = env[name.lower()] = value
+        return env
+
+    def close(self) -> None:
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def start_stub_sites(
+    page_delay: float = PAGE_DELAY,
+    uqload_delay: float = UQLOAD_DELAY,
+    episodes: int = EPISODES,
+) -> StubSites:
+    """
+    Start one stub server per site, plus the uqload proxy, in daemon threads.
+
+    Args:
+        page_delay: Seconds before a site page is answered
+        uqload_delay: Seconds before an uqload request is answered
+        episodes: Episodes listed per series or season
+
+    Returns:
+        The running stubs; call ``close()`` when done
+    """
+    stub = StubSites(page_delay, uqload_delay, episodes)
+    for site in SITES + ("uqload",):
+        stub._serve(site)
+    return stub
@@ -0,0 +1,101 @@
+"""
+uqload link scanning of large player pages.
+
+The anchor scanner of `scraping.links` is measured on pages as Selenium
+(``str``) and HTTP (``bytes``, ``memoryview``) hand them over, next to the
+combined regular expression it replaced.
+"""
+
+import re
+
+import pytest
+
+from benchmarks.stub_site import render
+from scraping.links import extract_uqload_links
+from scraping.uqload import embed_url, normalize_embed_url
+
+SIZES = {"64k": 64 * 1024, "512k": 512 * 1024}
+# Players spread over the page, each with its own file code
+PLAYERS = 4
+
+_PREVIOUS_RE = re.compile(
+    r"(?P<sources>sources?\s*:\s*\[(?P<block>[^\]]+)\])"
+    r"|(?P<embed>https?://(?:www\.)?uqload\.[a-z]+/embed-[^\"']+)"
+    r"|file_code=(?P<code>[a-zA-Z0-9]+)",
+    re.IGNORECASE,
+)
+_PREVIOUS_URL_RE = re.compile(r"https?://[^\s\"'<>]+", re.IGNORECASE)
+
+
+def regex_scan(html: str) -> set:
+    """The previous scan: one pass of a combined regular expression."""
+    links = set()
+    for match in _PREVIOUS_RE.finditer(html):
+        if match.group("block") is not None:
+            links.update(url for url in _PREVIOUS_URL_RE.findall(match.group("block"))
+                         if "uqload" in url)
+        elif match.group("embed") is not None:
+            links.add(match.group("embed"))
+        else:
+            links.add(embed_url(match.group("code")))
+    return links
+
+
+def player_page(size: int) -> str:
+    """A Flemmix episode page grown to ``size`` characters with search markup."""
+    filler = render("flemmix_search.html", query="arcane")
+    players = [
+        render("flemmix_episode.html", title="Arcane", episode=index,
+               uqload="https://uqload.cx", code=f"{index:012d}")
+        for index in range(PLAYERS)
+    ]
+    padding = max(0, size - sum(map(len, players))) // PLAYERS
+    chunk = (filler * (padding // len(filler) + 1))[:padding]
+    return "".join(chunk + player for player in players)
+
+
+@pytest.fixture(scope="module", params=sorted(SIZES))
+def page(request) -> str:
+    return player_page(SIZES[request.param])
+
+
+@pytest.mark.parametrize("form", ["str", "bytes", "memoryview"])
+def test_scan(benchmark, page, form):
+    document = {
+        "str": lambda: page,
+        "bytes": lambda: page.encode(),
+        "memoryview": lambda: memoryview(page.encode()),
+    }[form]()
+    links = benchmark(extract_uqload_links, document)
+    assert len(links) == PLAYERS
+
+
+def test_regex_scan(benchmark, page):
+    links = benchmark(regex_scan, page)
+    assert links == extract_uqload_links(page)
+
+
+@pytest.mark.parametrize("form", ["str", "bytes"])
+def test_mixed_case(page, form):
+    # Hosts and parameter names in any case, as the previous scan accepted
+    players = (
+        '<iframe src="https://UQLOAD.io/embed-abcdefghijkl.html"></iframe>'
+        '<a href="/player?FILE_CODE=MnOpQrStUvWx">'
+    )
+    document = page[:1024] + players + page[1024:]
+    links = extract_uqload_links(document.encode() if form == "bytes" else document)
+    assert links == regex_scan(document)
+    assert {"https://UQLOAD.io/embed-abcdefghijkl.html", embed_url("MnOpQrStUvWx")} <= links
+
+
+@pytest.mark.parametrize("form", ["str", "bytes"])
+@pytest.mark.parametrize("player", [
+    # An embed nested in the player URL of another host
+    '<iframe src="https://player.example/?u=https://uqload.cx/embed-abcdefghijkl.html"></iframe>',
+    # Carried in a query string, followed by other parameters
+    '<a href="https://go.example/r?next=https://uqload.cx/embed-abcdefghijkl.html&ref=1">',
+])
+def test_nested_url(page, form, player):
+    document = page[:1024] + player + page[1024:]
+    links = extract_uqload_links(document.encode() if form == "bytes" else document)
+    assert embed_url("abcdefghijkl", "uqload.cx") in {normalize_embed_url(link) for link in links}
@@ -0,0 +1,35 @@
+"""
+Memory used by a search and by a batch of uqload lookups.
+
+The peak traced allocation is reported in ``extra_info`` (``peak_kib``)
+together with the process's peak RSS, so regressions show up in the saved
+benchmark runs.
+"""
+
+import asyncio
+
+from conftest import max_rss_kib, measure_memory
+from scraping.resolver import get_resolver
+from test_bench_search import search
+from test_bench_videos import embed_urls
+
+
+def test_memory_search_flemmix(benchmark, app):
+    results, peak = benchmark.pedantic(
+        measure_memory, args=(lambda: search(app, "flemmix"),), rounds=3
+    )
+    assert len(results) == 50
+    benchmark.extra_info["peak_kib"] = peak // 1024
+    benchmark.extra_info["max_rss_kib"] = max_rss_kib()
+
+
+def test_memory_resolve_batch(benchmark, app):
+    urls = embed_urls(32)
+    result, peak = benchmark.pedantic(
+        measure_memory,
+        args=(lambda: asyncio.run(get_resolver().resolve(urls, "bench")),),
+        rounds=3,
+    )
+    assert len(result.videos) == 32
+    benchmark.extra_info["peak_kib"] = peak // 1024
+    benchmark.extra_info["max_rss_kib"] = max_rss_kib()
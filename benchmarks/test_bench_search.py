@@ -0,0 +1,29 @@
+"""Search latency per provider, against the stub sites."""
+
+from conftest import call_api, requires_browser
+
+
+def search(app, provider_name: str) -> list:
+    response = call_api(app, "GET", "/search",
+                        params={"query": "arcane", "provider_name": provider_name})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_search_flemmix(benchmark, app):
+    # Flemmix search pages are read over plain HTTP
+    results = benchmark(search, app, "flemmix")
+    assert len(results) == 50
+
+
+@requires_browser
+def test_search_papadustream(benchmark, app):
+    # Expands every series into its seasons
+    results = benchmark.pedantic(search, args=(app, "papadustream"), rounds=3)
+    assert len(results) == 50
+
+
+@requires_browser
+def test_search_french_stream(benchmark, app):
+    results = benchmark.pedantic(search, args=(app, "french-stream"), rounds=3)
+    assert len(results) == 50
@@ -0,0 +1,132 @@
+"""
+/get-videos latency and uqload resolution throughput, against the stub sites.
+
+Cold ``/get-videos`` calls crawl episode pages in a browser; the cached path
+and uqload resolution run without one. uqload metadata parsing is checked
+against the recorded embed and video pages.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.stub_site import UQLOAD_URL, VIDEO_SIZE, file_code, render
+from cache import get_cache
+from conftest import _call_api, call_api, requires_browser
+from scraping.resolver import UqloadResolver, get_resolver
+from scraping.uqload_info import VideoNotFound, parse_embed_page, parse_video_page
+
+PROVIDER_CLASSES = {
+    "flemmix": "FlemmixProvider",
+    "papadustream": "PapaduStreamProvider",
+    "french-stream": "FrenchStreamProvider",
+}
+
+
+def embed_urls(count: int) -> list:
+    return [f"http://uqload.stub/embed-{file_code('bench', index)}.html" for index in range(count)]
+
+
+def record_rate(benchmark, name: str, count: int) -> None:
+    """Store ``count`` items per mean round time as ``name`` in the report."""
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info[name] = round(count / benchmark.stats.stats.mean, 2)
+
+
+def get_videos(app, media_url: str, provider_name: str) -> list:
+    response = call_api(app, "POST", "/get-videos",
+                        json={"media_url": media_url, "provider_name": provider_name})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_uqload_resolve_one(benchmark, app):
+    url = embed_urls(1)[0]
+    video = benchmark(lambda: asyncio.run(get_resolver().resolve_one(url, "bench")))
+    assert video.size_in_bytes > 0
+
+
+@pytest.mark.parametrize("links", [1, 8, 32])
+def test_uqload_resolve_throughput(benchmark, app, links):
+    urls = embed_urls(links)
+    result = benchmark.pedantic(
+        lambda: asyncio.run(get_resolver().resolve(urls, "bench")), rounds=3
+    )
+    assert len(result.videos) == links
+    record_rate(benchmark, "videos_per_second", links)
+
+
+def test_uqload_parse_pages(benchmark):
+    code = file_code("bench", 0)
+    embed = render("uqload_embed.html", code=code, hash="abc", title="Arcane S01E01 (VF)")
+    page = render("uqload_page.html", code=code, title="Arcane S01E01 (VF)")
+
+    embed_info, page_info = benchmark(lambda: (parse_embed_page(embed), parse_video_page(page)))
+    assert embed_info == {
+        "url": f"{UQLOAD_URL}/abc/v.mp4",
+        "image_url": f"{UQLOAD_URL}/i/01/{code}.jpg",
+        "title": "Arcane S01E01 (VF)",
+    }
+    assert page_info == {"title": "Arcane S01E01 VF", "resolution": "1280x720", "duration": "42:13"}
+
+
+def test_uqload_parse_deleted():
+    with pytest.raises(VideoNotFound):
+        parse_embed_page("<html><body><b>File was deleted</b></body></html>")
+    assert parse_video_page('<div class="err">Not found</div>')["resolution"] is None
+
+
+@pytest.mark.parametrize("links", [256])
+def test_uqload_resolve_many(benchmark, app, links):
+    # One lookup in flight per link: they are coroutines, not pool threads.
+    # Cleared before each round, so no lookup is answered from memory.
+    urls = [f"http://uqload.stub/embed-{file_code('many', index)}.html" for index in range(links)]
+    resolver = UqloadResolver(concurrency=links, per_host=links, timeout=60)
+    result = benchmark.pedantic(
+        lambda: asyncio.run(resolver.resolve(urls, "bench")), setup=resolver.clear, rounds=2
+    )
+    assert len(result.videos) == links
+    assert all(video.size_in_bytes == VIDEO_SIZE for video in result.videos)
+    record_rate(benchmark, "videos_per_second", links)
+
+
+@pytest.mark.parametrize("provider_name", sorted(PROVIDER_CLASSES))
+def test_get_videos_cached(benchmark, app, stub, provider_name):
+    # Served from the video cache: measures the API and serialization overhead
+    media_url = stub.media_url(provider_name)
+    videos = asyncio.run(get_resolver().resolve(embed_urls(stub.episodes), "bench")).videos
+    get_cache().set(media_url, PROVIDER_CLASSES[provider_name], videos)
+
+    results = benchmark(get_videos, app, media_url, provider_name)
+    assert len(results) == stub.episodes
+
+
+@requires_browser
+@pytest.mark.parametrize("provider_name", sorted(PROVIDER_CLASSES))
+def test_get_videos_cold(benchmark, app, stub, provider_name):
+    media_url = stub.media_url(provider_name)
+    results = benchmark.pedantic(
+        get_videos, args=(app, media_url, provider_name),
+        setup=get_cache().clear, rounds=3,
+    )
+    assert results
+
+
+@requires_browser
+@pytest.mark.parametrize("calls", [4, 10])
+def test_get_videos_concurrent(benchmark, app, stub, calls):
+    # Distinct media pages, so every call crawls
+    paths = [f"/serie-en-streaming/30{index:02d}-bench-saison-1.html" for index in range(calls)]
+
+    async def fire():
+        return await asyncio.gather(*(
+            _call_api(app, "POST", "/get-videos", json={
+                "media_url": stub.url("flemmix") + path,
+                "provider_name": "flemmix",
+            })
+            for path in paths
+        ))
+
+    responses = benchmark.pedantic(lambda: asyncio.run(fire()), setup=get_cache().clear, rounds=2)
+    assert all(response.status_code == 200 for response in responses)
+    record_rate(benchmark, "calls_per_second", calls)
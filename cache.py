@@ -2,106 +2,697 @@
 Global cache management for video download links.
 
 This module provides caching functionality for video link retrieval operations
-but does NOT cache search operations, as per requirements.
+and an opt-in, short-lived cache for search results.
 """
 
+import asyncio
+import bisect
 import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
 import time
-from typing import Any, Callable, Dict, List, Optional
+import unicodedata
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from functools import wraps
 
+from models.uqvideo import UqVideo
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+
+    The pickled size is a stable, cheap proxy for lists of plain objects such
+    as `UqVideo`; values that cannot be pickled fall back to `sys.getsizeof`.
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "expires_at", "size")
+
+    def __init__(self, value: Any, fresh_until: float, expires_at: float, size: int):
+        self.value = value
+        # Served as fresh until `fresh_until`, as stale until `expires_at`
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+        self.size = size
+
+
+# Field order of the compact UqVideo encoding; append new fields at the end.
+_VIDEO_FIELDS = ("duration", "image_url", "resolution", "size",
+                 "title", "type", "url", "html_url")
+
+
+def _serialize(value: Any) -> bytes:
+    """
+    Encode a cached value for a persistent backend.
+
+    Lists of `UqVideo` are stored as zlib-compressed JSON arrays of field
+    values (no per-field keys). Nothing else is stored: a backend file may be
+    shared, so it never holds anything that runs code when loaded.
+
+    Raises:
+        TypeError: If ``value`` is not a list of `UqVideo`
+    """
+    if isinstance(value, list) and all(isinstance(item, UqVideo) for item in value):
+        rows = [
+            [video.duration, video.image_url, video.resolution, video.size_in_bytes,
+             video.title, video.type, video.url, video.html_url]
+            for video in value
+        ]
+        payload = json.dumps(rows, separators=(",", ":")).encode()
+        return b"J" + zlib.compress(payload)
+    raise TypeError(f"Only lists of UqVideo can be persisted, not {type(value).__name__}")
+
+
+def _deserialize(data: bytes) -> Any:
+    """
+    Decode a value written by `_serialize`.
+
+    Raises:
+        ValueError: If ``data`` is not a value `_serialize` writes (older
+            pickled entries included)
+    """
+    kind, payload = data[:1], data[1:]
+    if kind != b"J":
+        raise ValueError(f"Unknown cache payload kind {kind!r}")
+    try:
+        rows = json.loads(zlib.decompress(payload))
+        videos = []
+        for row in rows:
+            fields = dict(zip(_VIDEO_FIELDS, row))
+            videos.append(UqVideo(dict=fields, html_url=fields["html_url"]))
+    except (zlib.error, TypeError, KeyError) as exc:
+        raise ValueError(f"Corrupt cache payload: {exc!r}") from exc
+    return videos
+
+
+class CacheBackend:
+    """
+    Persistent storage behind `VideoCache`.
+
+    The in-memory LRU stays the first tier; a backend receives every write,
+    answers memory misses and survives restarts. Keys are the ones produced
+    by `VideoCache._make_key` and expiry times are absolute UNIX timestamps:
+    an entry is fresh until ``fresh_until`` and may be served stale until
+    ``expires_at``.
+    """
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """Return ``(value, expires_at, fresh_until)`` or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, expires_at: float, fresh_until: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def remove_expired(self, now: float) -> int:
+        """Drop entries expired at ``now``; return how many were removed."""
+        raise NotImplementedError
+
+    def load(self, now: float, limit: int) -> List[Tuple[str, Any, float, float]]:
+        """
+        Return up to ``limit`` unexpired ``(key, value, expires_at, fresh_until)``,
+        freshest first.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite-backed cache storage.
+
+    Uses WAL mode and a busy timeout so several uvicorn workers can share the
+    same file: readers never block, and concurrent writers wait for each
+    other instead of failing. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """
+        Initialize the backend, creating the database if needed.
+
+        Args:
+            path: Database file; parent directories are created
+            busy_timeout: Seconds a writer waits for another process's lock
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS video_cache ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " fresh_until REAL)"
+            )
+            columns = {
+                row[1] for row in connection.execute("PRAGMA table_info(video_cache)")
+            }
+            if "fresh_until" not in columns:
+                # Databases created before stale-while-revalidate
+                connection.execute("ALTER TABLE video_cache ADD COLUMN fresh_until REAL")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS video_cache_expires_at"
+                " ON video_cache (expires_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        row = self._connection().execute(
+            "SELECT payload, expires_at, fresh_until FROM video_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        payload, expires_at, fresh_until = row
+        try:
+            value = _deserialize(payload)
+        except ValueError as exc:
+            logger.warning("Ignoring unreadable cache entry %s: %s", key, exc)
+            return None
+        return value, expires_at, fresh_until or expires_at
+
+    def set(self, key: str, value: Any, expires_at: float, fresh_until: Optional[float] = None) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO video_cache (key, expires_at, payload, fresh_until)"
+                " VALUES (?, ?, ?, ?)",
+                (key, expires_at, _serialize(value), fresh_until or expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM video_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM video_cache")
+
+    def remove_expired(self, now: float) -> int:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM video_cache WHERE expires_at <= ?", (now,)
+            )
+        return cursor.rowcount
+
+    def load(self, now: float, limit: int) -> List[Tuple[str, Any, float, float]]:
+        rows = self._connection().execute(
+            "SELECT key, payload, expires_at, fresh_until FROM video_cache"
+            " WHERE expires_at > ? ORDER BY expires_at DESC LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        entries = []
+        for key, payload, expires_at, fresh_until in rows:
+            try:
+                value = _deserialize(payload)
+            except ValueError as exc:
+                logger.warning("Ignoring unreadable cache entry %s: %s", key, exc)
+                continue
+            entries.append((key, value, expires_at, fresh_until or expires_at))
+        return entries
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
 
 class VideoCache:
     """
     Global cache for video download links.
-    
+
     This cache stores the results of get_uqvideos_from_media_url calls
     to avoid repeatedly scraping the same URLs.
+
+    Entries expire after the TTL and the cache is bounded both in number of
+    entries and in (estimated) bytes; when full, the least recently used
+    entries are evicted. All operations take a short, non-blocking lock, so
+    the cache can be used from worker threads and from the event loop alike.
+
+    With a `CacheBackend`, writes also go to persistent storage, memory
+    misses are looked up there, and `warm_load` refills memory on startup.
+    Backend writes are queued to a single writer thread (write-behind), and
+    coroutines look memory misses up with `aget_entry`, which reads the
+    backend off the event loop: only the memory tier is touched on the loop.
+
+    Non-empty results stay available for ``stale_ttl`` seconds after they
+    expire, so callers can serve them while a refresh runs in the background
+    (see `get_entry`). Empty results and failures are cached separately, for
+    the shorter ``empty_ttl`` and ``failure_ttl``.
     """
-    
-    def __init__(self, ttl: int = 3600):
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60.0,
+        backend: Optional[CacheBackend] = None,
+        stale_ttl: int = 0,
+        empty_ttl: int = 300,
+        failure_ttl: int = 60,
+        provider_ttls: Optional[Dict[str, int]] = None,
+    ):
         """
         Initialize the video cache.
-        
+
         Args:
             ttl: Time to live for cache entries in seconds (default: 1 hour)
+            max_entries: Maximum number of entries kept (default: 1024)
+            max_bytes: Maximum estimated size of all values (default: 64 MiB)
+            sweep_interval: Seconds between two runs of the background
+                expiry sweeper, once started (default: 60)
+            backend: Optional persistent storage (default: memory only)
+            stale_ttl: Seconds an expired, non-empty entry may still be
+                served while it is refreshed (default: 0, disabled)
+            empty_ttl: Time to live of empty results (default: 5 minutes)
+            failure_ttl: Time to live of failed lookups (default: 1 minute)
+            provider_ttls: TTL overrides by provider name; other providers
+                use ``ttl``
         """
-        self._cache: Dict[str, tuple[Any, float]] = {}
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
         self._ttl = ttl
-    
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.backend = backend
+        self.stale_ttl = stale_ttl
+        self.empty_ttl = empty_ttl
+        self.failure_ttl = failure_ttl
+        self.provider_ttls: Dict[str, int] = dict(provider_ttls or {})
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+        # Backend writes, in order, started on first use
+        self._writer: Optional[ThreadPoolExecutor] = None
+
     def _make_key(self, url: str, provider_name: str) -> str:
         """
         Generate a cache key from URL and provider name.
-        
+
         Args:
             url: The media URL
             provider_name: The provider name
-            
+
         Returns:
             A unique cache key
         """
         key_str = f"{provider_name}:{url}"
         return hashlib.md5(key_str.encode()).hexdigest()
-    
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._bytes -= entry.size
+
+    def ttl_for(self, provider_name: str, value: Any = None) -> int:
+        """
+        Time to live for a value stored for ``provider_name``.
+
+        Empty values get the short ``empty_ttl``; others the provider's
+        override from ``provider_ttls``, or the default ``ttl``.
+        """
+        if value is not None and not value:
+            return self.empty_ttl
+        return self.provider_ttls.get(provider_name, self._ttl)
+
     def get(self, url: str, provider_name: str) -> Optional[List]:
         """
         Get cached video list if available and not expired.
-        
+
         Args:
             url: The media URL
             provider_name: The provider name
-            
+
         Returns:
             Cached video list or None if not found/expired
         """
+        entry = self.get_entry(url, provider_name)
+        if entry is None or entry[1]:
+            return None
+        return entry[0]
+
+    def get_entry(self, url: str, provider_name: str) -> Optional[Tuple[List, bool]]:
+        """
+        Get a cached video list, including one past its TTL but still within
+        the stale window.
+
+        Args:
+            url: The media URL
+            provider_name: The provider name
+
+        Returns:
+            ``(value, is_stale)``, or None if not found/expired
+        """
         key = self._make_key(url, provider_name)
-        
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            
-            # Check if cache entry has expired
-            if time.time() - timestamp < self._ttl:
-                return value
+        result = self._memory_get(key)
+        if result is not None:
+            return result
+        # Another worker (or a previous run) may have stored it on disk
+        return self._adopt(key, self._backend_get(key))
+
+    async def aget_entry(self, url: str, provider_name: str) -> Optional[Tuple[List, bool]]:
+        """
+        `get_entry` for coroutines: a memory miss is looked up in the backend
+        on a worker thread, so a slow disk or a locked database never blocks
+        the event loop.
+        """
+        key = self._make_key(url, provider_name)
+        result = self._memory_get(key)
+        if result is not None:
+            return result
+        stored = None
+        if self.backend is not None:
+            stored = await asyncio.to_thread(self._backend_get, key)
+        return self._adopt(key, stored)
+
+    def _memory_get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            return self._read(key, entry, time.time())
+
+    def _adopt(self, key: str, stored: Optional[Tuple[Any, float, float]]) -> Optional[Tuple[Any, bool]]:
+        """Count a memory miss, keeping what the backend answered for it in memory."""
+        if stored is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        value, expires_at, fresh_until = stored
+        stale = time.time() >= fresh_until
+        size = _estimate_size(value)
+        with self._lock:
+            self._store(key, value, fresh_until, expires_at, size)
+            if stale:
+                self._stale_hits += 1
             else:
-                # Remove expired entry
-                del self._cache[key]
-        
-        return None
-    
-    def set(self, url: str, provider_name: str, value: List) -> None:
+                self._hits += 1
+        return value, stale
+
+    def contains(self, url: str, provider_name: str) -> bool:
+        """
+        Whether a fresh or stale entry is held in memory, without counting a
+        lookup or touching the LRU order.
+        """
+        key = self._make_key(url, provider_name)
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and time.time() < entry.expires_at
+
+    def fresh_for(self, url: str, provider_name: str) -> Optional[float]:
+        """
+        Seconds until the in-memory entry turns stale (negative once it is),
+        or None if there is no live entry. Does not count as a lookup.
+        """
+        key = self._make_key(url, provider_name)
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or now >= entry.expires_at:
+                return None
+            return entry.fresh_until - now
+
+    def _read(self, key: str, entry: _Entry, now: float) -> Optional[Tuple[Any, bool]]:
+        """Classify a memory entry as fresh, stale or expired. Lock held."""
+        if now >= entry.expires_at:
+            self._remove(key)
+            self._expirations += 1
+            return None
+
+        self._cache.move_to_end(key)
+        if now >= entry.fresh_until:
+            self._stale_hits += 1
+            return entry.value, True
+        self._hits += 1
+        return entry.value, False
+
+    def _backend_get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        if self.backend is None:
+            return None
+        try:
+            stored = self.backend.get(key)
+        except Exception as exc:
+            logger.warning("Cache backend read failed: %r", exc)
+            return None
+        if stored is None or time.time() >= stored[1]:
+            return None
+        return stored
+
+    def set(self, url: str, provider_name: str, value: List, ttl: Optional[int] = None) -> None:
         """
         Store video list in cache.
-        
+
+        Least recently used entries are evicted until the cache fits its
+        limits again. A value larger than ``max_bytes`` on its own is not
+        stored.
+
         Args:
             url: The media URL
             provider_name: The provider name
             value: The video list to cache
+            ttl: Time to live in seconds (default: `ttl_for` the provider)
         """
+        if ttl is None:
+            ttl = self.ttl_for(provider_name, value)
+        # Empty results are not worth serving past their TTL
+        stale_ttl = self.stale_ttl if value else 0
+
         key = self._make_key(url, provider_name)
-        self._cache[key] = (value, time.time())
-    
+        fresh_until = time.time() + ttl
+        expires_at = fresh_until + stale_ttl
+
+        # Sized before taking the lock: pickling a long list is the slow part
+        size = _estimate_size(value)
+        with self._lock:
+            self._store(key, value, fresh_until, expires_at, size)
+
+        if self.backend is not None:
+            self._write_behind(self.backend.set, key, value, expires_at, fresh_until)
+
+    def _write_behind(self, write: Callable, *args) -> Future:
+        """Queue a backend write; writes run one at a time, in order."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-cache-writer")
+            writer = self._writer
+        return writer.submit(self._write, write, *args)
+
+    @staticmethod
+    def _write(write: Callable, *args) -> None:
+        try:
+            write(*args)
+        except Exception as exc:
+            logger.warning("Cache backend write failed: %r", exc)
+
+    def flush(self) -> None:
+        """Wait for the queued backend writes to complete."""
+        with self._lock:
+            writer = self._writer
+        if writer is not None:
+            writer.submit(lambda: None).result()
+
+    def set_failure(self, url: str, provider_name: str) -> None:
+        """
+        Record a failed lookup as an empty result for ``failure_ttl`` seconds.
+
+        An entry that still holds videos (even stale ones) is kept instead.
+        Only memory is checked, and the check is not counted as a lookup.
+        """
+        value = self._peek(self._make_key(url, provider_name))
+        if value:
+            return
+        self.set(url, provider_name, [], ttl=self.failure_ttl)
+
+    def _peek(self, key: str) -> Any:
+        """The live value held in memory for ``key``, or None, without counting a lookup."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or time.time() >= entry.expires_at:
+                return None
+            return entry.value
+
+    def _store(self, key: str, value: Any, fresh_until: float, expires_at: float, size: int) -> None:
+        """
+        Insert into the memory tier and evict down to the limits. Lock held.
+
+        ``size`` is the `_estimate_size` of ``value``, which callers work out
+        before taking the lock.
+        """
+        if key in self._cache:
+            self._remove(key)
+
+        if size > self.max_bytes:
+            return
+
+        self._cache[key] = _Entry(value, fresh_until, expires_at, size)
+        self._bytes += size
+
+        while (
+            len(self._cache) > self.max_entries
+            or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._cache))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def warm_load(self) -> int:
+        """
+        Fill the memory tier from the backend, freshest entries first.
+
+        Returns:
+            Number of entries loaded
+        """
+        if self.backend is None:
+            return 0
+        try:
+            rows = self.backend.load(time.time(), self.max_entries)
+        except Exception as exc:
+            logger.warning("Cache warm-load failed: %r", exc)
+            return 0
+
+        sizes = [_estimate_size(row[1]) for row in rows]
+        with self._lock:
+            # Oldest first, so the freshest end up most recently used
+            for (key, value, expires_at, fresh_until), size in zip(reversed(rows), reversed(sizes)):
+                self._store(key, value, fresh_until, expires_at, size)
+        return len(rows)
+
     def clear(self) -> None:
         """Clear all cache entries."""
-        self._cache.clear()
-    
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            # After the writes already queued, so none of them survives it
+            self._write_behind(self.backend.clear).result()
+
     def remove_expired(self) -> int:
         """
         Remove all expired cache entries.
-        
+
         Returns:
             Number of entries removed
         """
         current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if current_time - timestamp >= self._ttl
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self._cache.items()
+                if current_time >= entry.expires_at
+            ]
+
+            for key in expired_keys:
+                self._remove(key)
+            self._expirations += len(expired_keys)
+
+        if self.backend is not None:
+            try:
+                self.backend.remove_expired(current_time)
+            except Exception as exc:
+                logger.warning("Cache backend cleanup failed: %r", exc)
+
         return len(expired_keys)
 
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Hits, stale hits, misses, evictions (capacity), expirations
+            (TTL), current entries and bytes, and the configured limits
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def start_sweeper(self) -> None:
+        """Start a daemon thread that calls `remove_expired` periodically."""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop_sweeper.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep, name="video-cache-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper, if running."""
+        self._stop_sweeper.set()
+        sweeper, self._sweeper = self._sweeper, None
+        if sweeper is not None:
+            sweeper.join(timeout=5)
+
+    def close(self) -> None:
+        """Stop the sweeper, write the queued entries and close the backend."""
+        self.stop_sweeper()
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+        if self.backend is not None:
+            self.backend.close()
+
+    def _sweep(self) -> None:
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            self.remove_expired()
+
 
 # Global cache instance
 _global_cache = VideoCache()
@@ -112,31 +703,482 @@ def get_cache() -> VideoCache:
     return _global_cache
 
 
+def configure_cache(**kwargs) -> VideoCache:
+    """
+    Replace the global cache with a new one built from ``kwargs``
+    (see `VideoCache.__init__`). Existing entries are dropped.
+    """
+    global _global_cache
+    _global_cache.close()
+    _global_cache = VideoCache(**kwargs)
+    return _global_cache
+
+
+class RequestTracker:
+    """
+    Counts video link requests per (provider, media URL), with the counts
+    decaying over time so that recent popularity wins.
+    """
+
+    def __init__(self, max_keys: int = 10000, min_score: float = 0.05):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_keys: Pairs tracked at most; the least requested go first
+            min_score: Score under which a pair is forgotten on decay
+        """
+        self.max_keys = max_keys
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        # (provider name, url) -> decayed request count
+        self._scores: Dict[Tuple[str, str], float] = {}
+
+    def record(self, provider_name: str, url: str) -> None:
+        """Count one request for ``url`` on ``provider_name``."""
+        with self._lock:
+            key = (provider_name, url)
+            self._scores[key] = self._scores.get(key, 0.0) + 1
+            if len(self._scores) > self.max_keys:
+                # Drop the least requested tenth in one go
+                doomed = sorted(self._scores, key=self._scores.get)[:max(1, self.max_keys // 10)]
+                for key in doomed:
+                    del self._scores[key]
+
+    def decay(self, factor: float) -> None:
+        """Multiply every count by ``factor``, forgetting the ones that fade out."""
+        with self._lock:
+            self._scores = {
+                key: score * factor
+                for key, score in self._scores.items()
+                if score * factor >= self.min_score
+            }
+
+    def top(self, count: int) -> List[Tuple[str, str, float]]:
+        """The ``count`` most requested ``(provider name, url, score)``, most first."""
+        with self._lock:
+            ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        return [(provider_name, url, score) for (provider_name, url), score in ranked[:count]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._scores)
+
+
+# Global request tracker, fed by the video link decorators
+_request_tracker = RequestTracker()
+
+
+def get_request_tracker() -> RequestTracker:
+    """Get the global request tracker."""
+    return _request_tracker
+
+
+# In-flight lookups, keyed like the cache, shared by concurrent callers
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+
+def _forget_inflight(key: str, task: "asyncio.Task") -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark a failure as retrieved even if every waiter went away.
+    if not task.cancelled():
+        task.exception()
+
+
 def cache_video_links(func: Callable):
     """
     Decorator to cache the results of get_uqvideos_from_media_url methods.
-    
+
     This decorator only works with async methods that have 'url' parameter
     and belong to a class with provider identification.
+
+    Concurrent calls for the same (provider, url) are coalesced: the first
+    miss starts the lookup and later callers await the same task instead of
+    scraping the page again. A failure is propagated to every waiter and
+    cached as an empty result for `VideoCache.failure_ttl` only. A caller
+    that gets cancelled does not cancel the lookup for the others.
+
+    A stale entry is returned immediately while a single background lookup
+    refreshes it.
     """
     @wraps(func)
     async def wrapper(self, url: str, *args, **kwargs):
         # Get provider name from the class
         provider_name = self.__class__.__name__
-        
+
+        get_request_tracker().record(provider_name, url)
+
         # Try to get from cache
         cache = get_cache()
-        cached_result = cache.get(url, provider_name)
-        
-        if cached_result is not None:
+        key = cache._make_key(url, provider_name)
+        cached = await cache.aget_entry(url, provider_name)
+
+        if cached is not None:
+            cached_result, stale = cached
+            if stale and key not in _inflight:
+                _start_lookup(cache, key, func, self, url, args, kwargs)
             return cached_result
-        
+
+        # Join the lookup already running for this key, if any
+        task = _inflight.get(key)
+        if task is None:
+            task = _start_lookup(cache, key, func, self, url, args, kwargs)
+
+        return await asyncio.shield(task)
+
+    return wrapper
+
+
+def _start_lookup(cache: VideoCache, key: str, func: Callable, provider, url: str,
+                  args: tuple, kwargs: dict) -> "asyncio.Task":
+    """Run the wrapped lookup as a shared task that stores its result."""
+    provider_name = provider.__class__.__name__
+
+    async def lookup():
         # Call the original function
-        result = await func(self, url, *args, **kwargs)
-        
+        try:
+            result = await func(provider, url, *args, **kwargs)
+        except Exception as exc:
+            logger.warning("Video lookup failed for %s (%s): %r", url, provider_name, exc)
+            cache.set_failure(url, provider_name)
+            raise
+
         # Store in cache
         cache.set(url, provider_name, result)
-        
+
         return result
-    
+
+    task = asyncio.ensure_future(lookup())
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _forget_inflight(key, done))
+    return task
+
+
+async def refresh_video_links(provider, url: str) -> List:
+    """
+    Resolve ``url`` with ``provider`` again and store the result, whether or
+    not the cached entry is still fresh. Joins the lookup already in flight
+    for it, if any, and is not counted as a request.
+    """
+    method = type(provider).get_uqvideos_from_media_url
+    # The lookup beneath `cache_video_links`
+    func = getattr(method, "__wrapped__", method)
+    cache = get_cache()
+    key = cache._make_key(url, provider.__class__.__name__)
+    task = _inflight.get(key)
+    if task is None:
+        task = _start_lookup(cache, key, func, provider, url, (), {})
+    return await asyncio.shield(task)
+
+
+class _LiveVideos:
+    """The videos a streamed lookup has found so far, for every stream following it."""
+
+    def __init__(self):
+        self.videos: List = []
+        self._changed = asyncio.Condition()
+
+    async def add(self, video) -> None:
+        async with self._changed:
+            self.videos.append(video)
+            self._changed.notify_all()
+
+    async def finish(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def follow(self, task: "asyncio.Task"):
+        """Yield the videos found so far, then each new one, until ``task`` completes."""
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self.videos) or task.done())
+                found = self.videos[index:]
+            index += len(found)
+            for video in found:
+                yield video
+            if not found and task.done():
+                # Raises the lookup's error, if any
+                task.result()
+                return
+
+
+# Live state of the streamed lookups in `_inflight`, by the same keys
+_live: Dict[str, _LiveVideos] = {}
+
+
+def _start_stream_lookup(cache: VideoCache, key: str, func: Callable, provider, url: str,
+                         args: tuple, kwargs: dict) -> Tuple["asyncio.Task", _LiveVideos]:
+    """Drain the wrapped stream as a shared lookup, publishing each video as it comes."""
+    live = _LiveVideos()
+
+    async def publish(provider, url: str, *args, **kwargs) -> List:
+        try:
+            async with aclosing(func(provider, url, *args, **kwargs)) as stream:
+                async for video in stream:
+                    await live.add(video)
+        finally:
+            await live.finish()
+        return list(live.videos)
+
+    task = _start_lookup(cache, key, publish, provider, url, args, kwargs)
+    _live[key] = live
+
+    def forget(_):
+        if _live.get(key) is live:
+            del _live[key]
+
+    task.add_done_callback(forget)
+    return task, live
+
+
+def cache_video_stream(func: Callable):
+    """
+    Decorator to cache the videos of methods returning an async iterator
+    over the results of get_uqvideos_from_media_url.
+
+    A cached list (fresh or stale) is replayed at once; a stale one is also
+    refreshed in the background. Otherwise the stream follows the lookup in
+    flight for the same key, or starts one: a streamed lookup is shared
+    like the ones of `cache_video_links`, so concurrent streams and
+    ``get_uqvideos_from_media_url`` calls for the same media crawl it once.
+    Streams get each video as soon as it is found, and the full list is
+    cached once the lookup completes. A consumer that closes its stream
+    early stops following the lookup, which completes for the others.
+    """
+    @wraps(func)
+    async def wrapper(self, url: str, *args, **kwargs):
+        provider_name = self.__class__.__name__
+        get_request_tracker().record(provider_name, url)
+        cache = get_cache()
+        key = cache._make_key(url, provider_name)
+
+        cached = await cache.aget_entry(url, provider_name)
+        if cached is not None:
+            cached_result, stale = cached
+            if stale and key not in _inflight:
+                _start_stream_lookup(cache, key, func, self, url, args, kwargs)
+            for video in cached_result:
+                yield video
+            return
+
+        task = _inflight.get(key)
+        if task is None:
+            task, live = _start_stream_lookup(cache, key, func, self, url, args, kwargs)
+        else:
+            live = _live.get(key)
+
+        if live is None:
+            # A get_uqvideos_from_media_url lookup: its videos come at once
+            for video in await asyncio.shield(task):
+                yield video
+            return
+
+        async with aclosing(live.follow(task)) as videos:
+            async for video in videos:
+                yield video
+
+    return wrapper
+
+
+def normalize_query(text: str) -> str:
+    """
+    Fold a search query for use as a cache key: lowercased, accents
+    stripped and whitespace collapsed.
+
+    ``"  Les Misérables "`` becomes ``"les miserables"``.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
+
+class SearchCache:
+    """
+    Short-lived cache of search results, keyed by provider and normalized
+    query.
+
+    Each provider keeps a sorted index of its cached queries. With
+    ``prefix_match`` enabled, a query with no entry of its own is answered
+    from the shortest cached query that starts with it, so "futura" is
+    served from a cached "futurama" listing.
+    """
+
+    def __init__(
+        self,
+        ttl: int = 300,
+        max_entries: int = 512,
+        prefix_match: bool = False,
+        min_prefix_length: int = 3,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Time to live in seconds (default: 5 minutes)
+            max_entries: Maximum number of cached queries, all providers
+                together; least recently used ones are evicted first
+            prefix_match: Answer queries from longer cached queries they
+                are a prefix of
+            min_prefix_length: Shortest normalized query answered by prefix
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix_match = prefix_match
+        self.min_prefix_length = min_prefix_length
+        self._lock = threading.Lock()
+        # (provider, query) -> (results, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List, float]]" = OrderedDict()
+        # provider -> sorted queries, for prefix lookups
+        self._index: Dict[str, List[str]] = {}
+        self._hits = 0
+        self._prefix_hits = 0
+        self._misses = 0
+
+    def get(self, provider_name: str, text: str) -> Optional[List]:
+        """
+        Get cached search results.
+
+        Args:
+            provider_name: The provider name
+            text: The search query, as typed
+
+        Returns:
+            A copy of the cached results, or None if not found/expired
+        """
+        query = normalize_query(text)
+        now = time.time()
+
+        with self._lock:
+            results = self._lookup(provider_name, query, now)
+            if results is not None:
+                self._hits += 1
+                return list(results)
+
+            if self.prefix_match and len(query) >= self.min_prefix_length:
+                results = self._lookup_prefix(provider_name, query, now)
+                if results is not None:
+                    self._prefix_hits += 1
+                    return list(results)
+
+            self._misses += 1
+            return None
+
+    def set(self, provider_name: str, text: str, results: List) -> None:
+        """
+        Store search results.
+
+        Args:
+            provider_name: The provider name
+            text: The search query, as typed
+            results: The search results
+        """
+        key = (provider_name, normalize_query(text))
+
+        with self._lock:
+            if key not in self._entries:
+                bisect.insort(self._index.setdefault(provider_name, []), key[1])
+            self._entries[key] = (list(results), time.time() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _lookup(self, provider_name: str, query: str, now: float) -> Optional[List]:
+        """Exact lookup. Lock held."""
+        key = (provider_name, query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        results, expires_at = entry
+        if now >= expires_at:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return results
+
+    def _lookup_prefix(self, provider_name: str, query: str, now: float) -> Optional[List]:
+        """Results of the shortest fresh cached query starting with ``query``. Lock held."""
+        queries = self._index.get(provider_name, [])
+        position = bisect.bisect_left(queries, query)
+        candidates = []
+        while position < len(queries) and queries[position].startswith(query):
+            candidates.append(queries[position])
+            position += 1
+
+        for candidate in sorted(candidates, key=len):
+            results = self._lookup(provider_name, candidate, now)
+            if results is not None:
+                return results
+        return None
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Drop an entry and its index slot. Lock held."""
+        del self._entries[key]
+        provider_name, query = key
+        queries = self._index[provider_name]
+        del queries[bisect.bisect_left(queries, query)]
+
+    def clear(self) -> None:
+        """Clear all cached search results."""
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, prefix hit and miss counts, and the current entry count."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "prefix_hits": self._prefix_hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# Global search cache; None while search caching is disabled
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Get the global search cache, or None if search caching is disabled."""
+    return _search_cache
+
+
+def configure_search_cache(enabled: bool = True, **kwargs) -> Optional[SearchCache]:
+    """
+    Enable search caching with a new cache built from ``kwargs`` (see
+    `SearchCache.__init__`), or disable it.
+    """
+    global _search_cache
+    _search_cache = SearchCache(**kwargs) if enabled else None
+    return _search_cache
+
+
+def cache_search_results(func: Callable):
+    """
+    Decorator to cache the results of search_media methods, when search
+    caching is enabled with `configure_search_cache`.
+
+    Place it above ``@with_driver`` so that a cache hit does not check a
+    browser out of the pool. Empty results are not cached.
+    """
+    @wraps(func)
+    def wrapper(self, text: str, *args, **kwargs):
+        cache = get_search_cache()
+        if cache is None:
+            return func(self, text, *args, **kwargs)
+
+        provider_name = self.__class__.__name__
+        cached_results = cache.get(provider_name, text)
+        if cached_results is not None:
+            return cached_results
+
+        results = func(self, text, *args, **kwargs)
+        if results:
+            cache.set(provider_name, text, results)
+        return results
+
     return wrapper
@@ -6,8 +6,10 @@ Example usage of the FlemmixProvider
 import asyncio
 import undetected_chromedriver as uc
 from providers.flemmix import FlemmixProvider
+from scraping.pool import DriverPool
 
-async def main():
+
+def create_driver() -> uc.Chrome:
     # Setup Chrome driver
     chrome_options = uc.ChromeOptions()
     chrome_options.add_argument("--headless=new")
@@ -15,11 +17,15 @@ async def main():
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     
-    driver = uc.Chrome(options=chrome_options)
+    return uc.Chrome(options=chrome_options)
+
+
+async def main():
+    pool = DriverPool(create_driver, min_size=1, max_size=1)
     
     try:
         # Create provider
-        provider = FlemmixProvider(driver)
+        provider = FlemmixProvider(pool)
         
         # Example 1: Search for media
         print("Searching for 'Futurama' on Flemmix...")
@@ -48,7 +54,7 @@ async def main():
             print("No search results found")
     
     finally:
-        driver.quit()
+        pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
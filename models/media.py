@@ -1,5 +1,8 @@
+from lxml.html import HtmlElement
 from selenium.webdriver.remote.webelement import WebElement
 
+from scraping.extract import attr, select_one, text_of
+
 
 class Media:
     def __init__(self, title: str, url: str | None, image_url: str | None = None):
@@ -20,6 +23,19 @@ class Media:
 
         return Media(title, url, image_url)
 
+    @staticmethod
+    def from_html_element(element: HtmlElement) -> "Media":
+        """Same as `from_web_element`, on a tile parsed from a page snapshot."""
+        title = text_of(select_one(
+            element, ".//div[contains(@class, 'short-title')]"
+        ))
+        url = attr(select_one(
+            element, ".//a[contains(@class, 'short-poster img-box with-mask')]"
+        ), "href")
+        image_url = attr(select_one(element, ".//img"), "src")
+
+        return Media(title, url, image_url)
+
     def to_dict(self):
         return {
             "title": self.title,
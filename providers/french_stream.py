@@ -1,47 +1,57 @@
+import os
 import urllib.parse
-from fastapi.concurrency import run_in_threadpool
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 
 from models.media import Media
 from models.uqvideo import UqVideo
-from uqload_dl import UQLoad
 
-from providers.provider import AbstractProvider
-from cache import cache_video_links
+from providers.provider import AbstractProvider, timed, with_driver
+from cache import cache_search_results, cache_video_links
+from scraping import metrics
+from scraping.executor import run_scraping
+from scraping.extract import select
+from scraping.pool import DriverPool
+from scraping.resolver import get_resolver
 
 
 class FrenchStreamProvider(AbstractProvider):
-    def __init__(self, driver: webdriver.Chrome):
-        super().__init__(driver)
+    BASE_URL = os.getenv("FRENCH_STREAM_BASE_URL", "https://www.french-streaming.tv")
 
+    def __init__(self, pool: DriverPool):
+        super().__init__(pool)
+
+    @cache_search_results
+    @with_driver
     def search_media(self, text: str) -> list[Media]:
         """
         Searches for media on french-streaming.tv and returns a list of Media objects.
         """
         uri = urllib.parse.quote(text)
-        self.driver.get(f"https://www.french-streaming.tv/search/{uri}")
+        self._navigate(f"{self.BASE_URL}/search/{uri}")
 
-        series = self.driver.find_elements(
-            "xpath", "//div[contains(@class, 'short serie')]"
-        )
-        films = self.driver.find_elements(
-            "xpath", "//div[contains(@class, 'short-in nl')]"
-        )
+        page = self._snapshot()
+        with self._span(metrics.EXTRACTION):
+            series = select(page, "//div[contains(@class, 'short serie')]")
+            films = select(page, "//div[contains(@class, 'short-in nl')]")
 
-        all_results = series + films
-        if len(all_results) > 50:
-            all_results = all_results[:50]
+            all_results = series + films
+            if len(all_results) > 50:
+                all_results = all_results[:50]
 
-        return [Media.from_web_element(sf) for sf in all_results]
+            return [Media.from_html_element(sf) for sf in all_results]
 
-    @cache_video_links
-    async def get_uqvideos_from_media_url(self, url: str) -> list[UqVideo]:
+    @with_driver
+    def _get_uqload_links(self, url: str) -> list[str]:
         """
-        Gets all UqVideo objects from a media page URL.
+        Collects the uqload links listed on a media page.
+        """
+        self._navigate(url)
+        return self._read_uqload_links()
+
+    @timed(metrics.EXTRACTION)
+    def _read_uqload_links(self) -> list[str]:
+        """
+        Reads the uqload links of the media page loaded in the driver.
         """
-        self.driver.get(url)
         try:
             uqloadButton = self.driver.find_element(
                 "xpath", "//a[contains(@data-href, 'uqload') and contains(@id, 'singh1')]"
@@ -58,17 +68,14 @@ class FrenchStreamProvider(AbstractProvider):
             )
             links = [link.get_attribute("data-url-default")
                      for link in links_elements]
+        return links
 
-        uqvideos = []
-        for link in links:
-            if not link:
-                continue
-            try:
-                uqload = UQLoad(url=link)
-                # Run the blocking, problematic function in a separate thread
-                video_info = await run_in_threadpool(uqload.get_video_info)
-                uqvideos.append(UqVideo(dict=video_info, html_url=link))
-            except Exception as e:
-                print(f"Error getting video info for {link}: {e}")
-                pass
-        return uqvideos
+    @cache_video_links
+    async def get_uqvideos_from_media_url(self, url: str) -> list[UqVideo]:
+        """
+        Gets all UqVideo objects from a media page URL.
+        """
+        links = await run_scraping(self._get_uqload_links, url)
+        links = [link for link in dict.fromkeys(links) if link]
+        result = await get_resolver().resolve(links, type(self).__name__)
+        return result.videos
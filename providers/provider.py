@@ -1,11 +1,101 @@
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import AsyncIterator, Callable, ContextManager, Iterator
+
 from models.media import Media
 from models.uqvideo import UqVideo
+from scraping import metrics
+from scraping.executor import check_deadline
+from scraping.extract import parse_html
+from scraping.pool import DriverPool, Lease
+from lxml.html import HtmlElement
 from selenium import webdriver
 
 
+def with_driver(func: Callable):
+    """
+    Run a provider method with a driver checked out of the pool.
+
+    Nested calls reuse the lease taken by the outermost one, so helpers can be
+    decorated too without checking out a second browser.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._leased():
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def timed(stage: str):
+    """Time every call of a provider method as ``stage`` (see `scraping.metrics`)."""
+    def decorate(func: Callable):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self._span(stage):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
 class AbstractProvider:
-    def __init__(self, driver: webdriver.Chrome):
-        self.driver = driver
+    def __init__(self, pool: DriverPool):
+        self.pool = pool
+        self._lease: contextvars.ContextVar[Lease | None] = contextvars.ContextVar(
+            f"{type(self).__name__}_lease", default=None
+        )
+
+    @property
+    def driver(self) -> webdriver.Chrome:
+        """The driver leased for the operation running in the current context."""
+        lease = self._lease.get()
+        if lease is None:
+            raise RuntimeError(
+                f"{type(self).__name__} has no driver checked out; "
+                "decorate the calling method with @with_driver"
+            )
+        return lease.driver
+
+    @contextmanager
+    def _leased(self) -> Iterator[Lease]:
+        """Check a driver out of the pool for the duration of the block."""
+        current = self._lease.get()
+        if current is not None:
+            yield current
+            return
+
+        check_deadline()
+        with self.pool.lease(affinity=type(self).__name__) as lease:
+            token = self._lease.set(lease)
+            try:
+                yield lease
+            finally:
+                self._lease.reset(token)
+
+    def _span(self, stage: str) -> ContextManager[None]:
+        """Time a block as ``stage`` of this provider (see `scraping.metrics`)."""
+        return metrics.span(type(self).__name__, stage)
+
+    def _record_error(self, stage: str) -> None:
+        """Count an error of ``stage`` that was handled rather than raised."""
+        metrics.record_error(type(self).__name__, stage)
+
+    def _navigate(self, url: str) -> None:
+        """Load ``url`` in the leased driver."""
+        lease = self._lease.get()
+        if lease is None:
+            raise RuntimeError(f"{type(self).__name__} has no driver checked out")
+        check_deadline()
+        with self._span(metrics.NAVIGATION):
+            lease.navigate(url)
+
+    def _snapshot(self) -> HtmlElement:
+        """Parse the page currently loaded in the leased driver, in one go."""
+        with self._span(metrics.EXTRACTION):
+            return parse_html(self.driver.page_source, base_url=self.driver.current_url)
 
     def search_media(self, text: str) -> list[Media]:
         """
@@ -44,3 +134,20 @@ class AbstractProvider:
             NotImplementedError: This method must be implemented by subclasses.
         """
         raise NotImplementedError
+
+    async def iter_uqvideos_from_media_url(self, url: str) -> AsyncIterator[UqVideo]:
+        """
+        Yield the unique videos of a media URL as they are found.
+
+        Providers that crawl episode by episode override this to yield each
+        video as soon as it resolves. The default waits for
+        `get_uqvideos_from_media_url` and yields its results.
+
+        Args:
+            url (str): The media URL to extract videos from.
+
+        Yields:
+            UqVideo: The videos found at the given URL.
+        """
+        for video in await self.get_uqvideos_from_media_url(url):
+            yield video
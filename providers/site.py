@@ -0,0 +1,534 @@
+"""
+Shared scraping engine for uqload streaming sites.
+
+Most sites work the same way: a search page lists media tiles, a media page
+lists episode links, and each episode page reveals uqload players in iframes
+once a button is clicked. :class:`SiteProvider` implements that flow once,
+on top of the tiered fetcher, the shared HTTP sessions, the single-pass link
+extractor and the episode crawler, and reads everything site specific (URL
+templates, selectors, timeouts) from a :class:`SiteDescriptor`. A site that
+follows the flow is a descriptor; one that differs overrides the step that
+does.
+"""
+
+import logging
+import urllib.parse
+from collections import Counter
+from contextlib import suppress
+from typing import AsyncIterator, Callable, List, Sequence, Set
+
+from lxml.html import HtmlElement
+
+from cache import cache_search_results, cache_video_links, cache_video_stream
+from models.media import Media
+from models.uqvideo import UqVideo
+from providers.provider import AbstractProvider, timed, with_driver
+from scraping import metrics
+from scraping.crawl import EpisodeResult, crawl_episodes, merge_candidates
+from scraping.executor import DeadlineExceeded, fan_out, run_scraping
+from scraping.extract import attr, select, select_one, text_of
+from scraping.fetch import TIERED, TieredFetcher
+from scraping.http import get_http_client
+from scraping.links import extract_uqload_links
+from scraping.pool import DriverPool
+from scraping.ready import Readiness
+from scraping.resolver import get_resolver
+from scraping.session import get_session_pool
+from scraping.strategy import SearchStrategy, get_strategy_memory
+from scraping.stream import stream_episode_videos
+from scraping.uqload import normalize_embed_url
+
+logger = logging.getLogger(__name__)
+
+# Used when the browser's own user agent can't be read
+FALLBACK_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+)
+
+
+class SiteDescriptor:
+    """What the scraping engine needs to know about a site."""
+
+    def __init__(
+        self,
+        base_url: str,
+        search_urls: Sequence[str] = (),
+        search_item_xpaths: Sequence[str] = (),
+        search_title_xpaths: Sequence[str] = (),
+        search_url_xpaths: Sequence[str] = (".//a[@href]",),
+        search_image_attrs: Sequence[str] = ("data-src", "src"),
+        search_fetch: str = TIERED,
+        episode_xpaths: Sequence[str] = (),
+        reveal_xpaths: Sequence[str] = (),
+        iframe_xpath: str = "//iframe[contains(@src, 'uqload')]",
+        reveal_timeout: float = 3,
+        iframe_timeout: float = 5,
+        fetch_iframes: bool = False,
+        wait_timeout: float = 10,
+    ):
+        """
+        Describe a site.
+
+        Args:
+            base_url: Root URL of the site; relative links are resolved against it
+            search_urls: Search URL templates relative to ``base_url``, with a
+                ``{query}`` placeholder, in probing order
+            search_item_xpaths: XPaths of search result items, most specific first
+            search_title_xpaths: XPaths of an item's title, relative to the item
+            search_url_xpaths: XPaths of an item's link, relative to the item
+            search_image_attrs: Attributes of an item's image holding its URL
+            search_fetch: Fetch strategy of search pages (see `scraping.fetch`)
+            episode_xpaths: XPaths of episode links on a media page; the first
+                that matches is used
+            reveal_xpaths: XPaths of the buttons clicked on an episode page to
+                reveal its players
+            iframe_xpath: XPath of the uqload player iframes
+            reveal_timeout: Seconds to wait for each kind of reveal button
+            iframe_timeout: Seconds to wait for the player iframes
+            fetch_iframes: Whether iframe pages are also fetched over HTTP, for
+                players that only print their links server side
+            wait_timeout: Default seconds to wait for an element
+        """
+        self.base_url = base_url
+        self.search_urls = tuple(search_urls)
+        self.search_item_xpaths = tuple(search_item_xpaths)
+        self.search_title_xpaths = tuple(search_title_xpaths)
+        self.search_url_xpaths = tuple(search_url_xpaths)
+        self.search_image_attrs = tuple(search_image_attrs)
+        self.search_fetch = search_fetch
+        self.episode_xpaths = tuple(episode_xpaths)
+        self.reveal_xpaths = tuple(reveal_xpaths)
+        self.iframe_xpath = iframe_xpath
+        self.reveal_timeout = reveal_timeout
+        self.iframe_timeout = iframe_timeout
+        self.fetch_iframes = fetch_iframes
+        self.wait_timeout = wait_timeout
+
+    def search_url(self, template: str, query: str) -> str:
+        return self.base_url + template.format(query=query)
+
+
+class SiteProvider(AbstractProvider):
+    """
+    Provider driven by a :class:`SiteDescriptor`.
+
+    Subclasses set ``SITE``. Search probes the descriptor's URL templates and
+    selectors and remembers what worked (see `scraping.strategy`); videos are
+    found by crawling the episode links of a media page concurrently and
+    resolving the uqload links of every episode.
+    """
+
+    SITE: SiteDescriptor
+    MAX_SEARCH_RESULTS = 50
+
+    def __init__(self, pool: DriverPool):
+        super().__init__(pool)
+        # Shared with every other provider of the same site
+        self._http = get_session_pool().session(type(self).__name__)
+        self._user_agent: str = ""
+        self._ready = Readiness()
+        self._fetcher = TieredFetcher(self, self._http, readiness=self._ready)
+
+    # --- Browser and session helpers ---
+
+    @timed(metrics.WAIT)
+    def _settle(self, timeout: float, quiet_period: float | None = None) -> bool:
+        """Wait for the current page (or frame) to load and go quiet."""
+        return self._ready.settle(self.driver, timeout=timeout, quiet_period=quiet_period)
+
+    @timed(metrics.WAIT)
+    def _wait_for(self, xpath: str, timeout: float | None = None):
+        """Wait for elements to be present on the page."""
+        return self._ready.wait_for(self.driver, xpath, timeout or self.SITE.wait_timeout)
+
+    @classmethod
+    def _normalize_url(cls, url: str | None) -> str | None:
+        """Normalize relative URLs to absolute URLs."""
+        if not url:
+            return None
+        return urllib.parse.urljoin(cls.SITE.base_url, url)
+
+    def _get_user_agent(self) -> str:
+        """Get the user agent from the browser."""
+        if self._user_agent:
+            return self._user_agent
+
+        try:
+            self._user_agent = self.driver.execute_script("return navigator.userAgent;")
+        except Exception:
+            self._user_agent = FALLBACK_USER_AGENT
+        return self._user_agent
+
+    def _browser_cookies(self, domain: str) -> List[dict]:
+        """The cookies of the leased browser that apply to ``domain``."""
+        try:
+            selenium_cookies = self.driver.get_cookies()
+        except Exception:
+            return []
+
+        cookies: List[dict] = []
+        for cookie in selenium_cookies:
+            if not cookie.get("name") or cookie.get("value") is None:
+                continue
+
+            normalized_domain = (cookie.get("domain") or domain).lstrip(".")
+            if (
+                normalized_domain
+                and normalized_domain not in domain
+                and domain not in normalized_domain
+            ):
+                continue
+            cookies.append(cookie)
+        return cookies
+
+    def _sync_session_cookies(self, target_url: str) -> None:
+        """Sync cookies from Selenium to the HTTP session."""
+        domain = urllib.parse.urlparse(target_url).netloc
+        if not domain:
+            return
+
+        with suppress(Exception):
+            self._http.cookies.clear(domain=domain)
+
+        for cookie in self._browser_cookies(domain):
+            self._http.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain") or domain,
+                path=cookie.get("path", "/"),
+            )
+
+    # --- Search ---
+
+    @cache_search_results
+    def search_media(self, text: str) -> List[Media]:
+        """
+        Search for media on the site.
+
+        The search URL template and selectors that worked last are tried
+        first; every template is only probed when they fail.
+
+        Args:
+            text: Search query string
+
+        Returns:
+            List of Media objects (at most ``MAX_SEARCH_RESULTS``)
+
+        Raises:
+            DeadlineExceeded: If the scraping deadline passed mid-search; the
+                strategies cut off are not recorded as failures
+        """
+        query = urllib.parse.quote(text)
+        memory = get_strategy_memory()
+        provider_name = type(self).__name__
+
+        learned = memory.learned(provider_name)
+        if learned is not None:
+            try:
+                medias = self._search_with(learned, query)
+            except DeadlineExceeded:
+                # Cut off, not failed: says nothing about the strategy
+                raise
+            except Exception as exc:
+                logger.warning("Learned search strategy %s failed: %r", learned, exc)
+                self._record_error(metrics.SEARCH)
+                medias = []
+            memory.record(provider_name, learned, success=bool(medias))
+            if medias:
+                return medias[:self.MAX_SEARCH_RESULTS]
+
+        # Probe every search URL template at once; the first one, in order,
+        # that yields results wins and is remembered.
+        templates = self.SITE.search_urls
+        medias: List[Media] = []
+        probes = fan_out(
+            lambda template: self._probe_search(template, query),
+            templates,
+            concurrency=len(templates),
+        )
+        try:
+            for template, future in zip(templates, probes):
+                if isinstance(future.exception(), DeadlineExceeded):
+                    raise future.exception()
+                if future.exception() is not None:
+                    logger.warning("Search URL %s failed: %r", template, future.exception())
+                    self._record_error(metrics.SEARCH)
+                    continue
+                strategy, medias = future.result()
+                if strategy is None:
+                    continue
+                memory.record(provider_name, strategy, success=bool(medias))
+                if medias:
+                    break
+        finally:
+            probes.close()
+
+        return medias[:self.MAX_SEARCH_RESULTS]
+
+    def _search_with(self, strategy: SearchStrategy, query: str) -> List[Media]:
+        """Search using a known URL template and selectors."""
+        result = self._fetcher.fetch(
+            self.SITE.search_url(strategy.url_template, query),
+            expect=strategy.item_xpath,
+            wait_timeout=5,
+            strategy=self.SITE.search_fetch,
+        )
+        with self._span(metrics.EXTRACTION):
+            return self._parse_search_results(
+                result.page, strategy.item_xpath, self._title_xpaths(strategy.title_xpath)
+            )
+
+    def _probe_search(self, template: str, query: str) -> tuple[SearchStrategy | None, List[Media]]:
+        """
+        Search using ``template``, working out which selectors match.
+
+        Returns:
+            The strategy that read the page (None if no item selector
+            matched) and the media found
+        """
+        # Wait for any of the item selectors to match, then extract
+        # everything from a single page snapshot
+        result = self._fetcher.fetch(
+            self.SITE.search_url(template, query),
+            expect=" | ".join(self.SITE.search_item_xpaths),
+            wait_timeout=5,
+            strategy=self.SITE.search_fetch,
+        )
+        page = result.page
+
+        for item_xpath in self.SITE.search_item_xpaths:
+            if not select(page, item_xpath):
+                continue
+            with self._span(metrics.EXTRACTION):
+                title_xpath = self._match_title_xpath(page, item_xpath)
+                medias = self._parse_search_results(
+                    page, item_xpath, self._title_xpaths(title_xpath)
+                )
+            return SearchStrategy(template, item_xpath, title_xpath), medias
+
+        return None, []
+
+    @classmethod
+    def _title_xpaths(cls, preferred: str | None) -> Sequence[str]:
+        """The title XPaths to try, ``preferred`` first."""
+        title_xpaths = cls.SITE.search_title_xpaths
+        if not preferred:
+            return title_xpaths
+        return [preferred] + [xpath for xpath in title_xpaths if xpath != preferred]
+
+    @classmethod
+    def _match_title_xpath(cls, page: HtmlElement, item_xpath: str) -> str | None:
+        """The title XPath that reads the title of most result items."""
+        matches = Counter()
+        for elem in select(page, item_xpath)[:cls.MAX_SEARCH_RESULTS]:
+            for title_xpath in cls.SITE.search_title_xpaths:
+                title_elem = select_one(elem, title_xpath)
+                if title_elem is not None and (text_of(title_elem) or title_elem.get("title")):
+                    matches[title_xpath] += 1
+                    break
+
+        if not matches:
+            return None
+        return matches.most_common(1)[0][0]
+
+    @classmethod
+    def _parse_search_results(
+        cls,
+        page: HtmlElement,
+        item_xpath: str,
+        title_xpaths: Sequence[str] | None = None,
+    ) -> List[Media]:
+        """Extract media from the search result items matching ``item_xpath``."""
+        site = cls.SITE
+        medias: List[Media] = []
+
+        for elem in select(page, item_xpath)[:cls.MAX_SEARCH_RESULTS]:
+            title = None
+            for title_xpath in title_xpaths or site.search_title_xpaths:
+                title_elem = select_one(elem, title_xpath)
+                if title_elem is None:
+                    continue
+                title = text_of(title_elem) or title_elem.get("title")
+                if title:
+                    break
+
+            if not title:
+                continue
+
+            url = None
+            for url_xpath in site.search_url_xpaths:
+                url = cls._normalize_url(attr(select_one(elem, url_xpath), "href"))
+                if url and "javascript" not in url:
+                    break
+
+            image_url = attr(select_one(elem, ".//img"), *site.search_image_attrs)
+
+            medias.append(Media(title=title, url=url, image_url=image_url))
+
+        return medias
+
+    # --- Episodes ---
+
+    def _get_episode_links(self, media_url: str) -> List[str]:
+        """
+        Extract the episode links of a media page.
+
+        Listing pages are usually static; the browser is only used when plain
+        HTTP gets a challenge or a page without episode links. A page without
+        any is treated as a single episode.
+        """
+        result = self._fetcher.fetch(
+            media_url, expect=" | ".join(self.SITE.episode_xpaths), wait_timeout=5
+        )
+        with self._span(metrics.EXTRACTION):
+            episode_links = self._parse_episode_links(result.page)
+
+        return episode_links or [media_url]
+
+    @classmethod
+    def _parse_episode_links(cls, page: HtmlElement) -> List[str]:
+        """Extract episode links using the first XPath that matches."""
+        episode_links: List[str] = []
+
+        for xpath in cls.SITE.episode_xpaths:
+            for elem in select(page, xpath):
+                normalized = cls._normalize_url(elem.get("href"))
+                if normalized and normalized not in episode_links:
+                    episode_links.append(normalized)
+
+            if episode_links:
+                break
+
+        return episode_links
+
+    @with_driver
+    def _extract_uqload_from_page(self, page_url: str) -> Set[str]:
+        """Extract the uqload link candidates of an episode page."""
+        site = self.SITE
+        candidates: Set[str] = set()
+
+        try:
+            self._navigate(page_url)
+            self._settle(timeout=5)
+        except Exception:
+            self._record_error(metrics.NAVIGATION)
+            return candidates
+
+        # Click the buttons that reveal the players
+        for xpath in site.reveal_xpaths:
+            for button in self._wait_for(xpath, timeout=site.reveal_timeout):
+                with suppress(Exception):
+                    self.driver.execute_script(
+                        "arguments[0].scrollIntoView({block: 'center'});", button
+                    )
+                    self.driver.execute_script("arguments[0].click();", button)
+                    self._settle(timeout=2, quiet_period=0.15)
+
+        for iframe in self._wait_for(site.iframe_xpath, timeout=site.iframe_timeout):
+            src = None
+            with suppress(Exception):
+                src = iframe.get_attribute("src")
+            if src and "uqload" in src:
+                candidates.add(src)
+
+            candidates.update(self._collect_uqload_from_iframe(iframe))
+
+            if src and site.fetch_iframes:
+                candidates.update(extract_uqload_links(self._fetch_iframe_html(src, page_url)))
+
+        with suppress(Exception):
+            candidates.update(extract_uqload_links(self.driver.page_source))
+
+        return candidates
+
+    @timed(metrics.IFRAME_SCAN)
+    def _collect_uqload_from_iframe(self, iframe) -> Set[str]:
+        """Extract uqload links from within an iframe."""
+        links: Set[str] = set()
+        try:
+            with suppress(Exception):
+                self.driver.execute_script("arguments[0].removeAttribute('sandbox');", iframe)
+            self.driver.switch_to.frame(iframe)
+            self._settle(timeout=2, quiet_period=0.1)
+            html = self.driver.execute_script(
+                "return document.documentElement ? document.documentElement.outerHTML : '';"
+            )
+            links.update(extract_uqload_links(html))
+        except Exception:
+            pass
+        finally:
+            with suppress(Exception):
+                self.driver.switch_to.default_content()
+        return links
+
+    @timed(metrics.IFRAME_SCAN)
+    def _fetch_iframe_html(self, iframe_url: str, referer: str) -> bytes | None:
+        """
+        Fetch an iframe page over HTTP with the browser's identity.
+
+        Player hosts are shared by every site, so the request goes through
+        the process-wide async client and its kept-alive connections.
+        Returns the raw body: the link scanner reads bytes without decoding.
+        """
+        headers = {
+            "User-Agent": self._get_user_agent(),
+            "Referer": referer,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+        }
+        cookies = self._browser_cookies(urllib.parse.urlparse(iframe_url).netloc)
+        if cookies:
+            headers["Cookie"] = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+        try:
+            response = get_http_client().request_blocking(
+                "GET", iframe_url, headers=headers, follow_redirects=True
+            )
+        except Exception:
+            return None
+        if response.is_success and "html" in response.headers.get("Content-Type", ""):
+            return response.content
+        return None
+
+    # --- Videos ---
+
+    def _collect_uqload_links(
+        self, url: str, on_progress: Callable[[EpisodeResult], None] | None = None
+    ) -> List[str]:
+        """Collect normalized, deduplicated uqload links for a media URL."""
+        episode_links = self._get_episode_links(url)
+
+        # Episodes are crawled concurrently, each with a driver of its own;
+        # no lease is held here so the workers can use the whole pool.
+        results: List[EpisodeResult] = []
+        for result in crawl_episodes(self._extract_uqload_from_page, episode_links):
+            results.append(result)
+            if result.error is not None:
+                self._record_error(metrics.EPISODE_CRAWL)
+            if on_progress is not None:
+                on_progress(result)
+
+        return merge_candidates(results, normalize_embed_url)
+
+    @cache_video_links
+    async def get_uqvideos_from_media_url(self, url: str) -> List[UqVideo]:
+        """
+        Get uqload videos from a media URL.
+
+        Args:
+            url: Media page URL
+
+        Returns:
+            List of UqVideo objects
+        """
+        links = await run_scraping(self._collect_uqload_links, url)
+        result = await get_resolver().resolve(links, type(self).__name__)
+        return result.videos
+
+    @cache_video_stream
+    def iter_uqvideos_from_media_url(self, url: str) -> AsyncIterator[UqVideo]:
+        """Yield uqload videos from a media URL as the episodes resolve."""
+        return stream_episode_videos(
+            self._collect_uqload_links, normalize_embed_url, url, type(self).__name__,
+        )
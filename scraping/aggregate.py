@@ -0,0 +1,123 @@
+"""
+Searching every provider at once.
+
+:func:`search_all` runs the search of each provider concurrently on the
+scraping executor and waits for each one no longer than a deadline, so the
+call costs about as much as the slowest provider that makes it in time
+rather than the sum of all of them. Providers that miss the deadline or fail
+are reported instead of failing the call, and the results are merged across
+sites by normalized title. A search that misses its deadline also stops
+scraping at its next navigation (see `scraping.executor.scraping_deadline`),
+so it doesn't keep an executor thread and a driver from later requests.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, Mapping
+
+from cache import normalize_query
+from models.media import Media
+from providers.provider import AbstractProvider
+from scraping.executor import run_scraping, scraping_deadline
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r"[^\w]+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Fold a media title for comparison across sites: lowercased, accents
+    and punctuation stripped and whitespace collapsed.
+
+    ``"Arcane - Saison 2"`` and ``"arcane saison 2"`` both become
+    ``"arcane saison 2"``.
+    """
+    return " ".join(_PUNCTUATION_RE.sub(" ", normalize_query(title)).split())
+
+
+class ProviderOutcome:
+    """How one provider's part of a multi-provider search went."""
+
+    def __init__(self, name: str, medias: List[Media], status: str, elapsed: float,
+                 error: str | None = None):
+        self.name = name
+        self.medias = medias
+        # "ok", "timeout" or "error"
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "count": len(self.medias),
+            "elapsed": round(self.elapsed, 3),
+            "error": self.error,
+        }
+
+
+async def _search_one(name: str, provider: AbstractProvider, query: str,
+                      deadline: float) -> ProviderOutcome:
+    start = time.perf_counter()
+    try:
+        # The thread can't be stopped at the deadline; it gives up at its
+        # next navigation instead.
+        with scraping_deadline(deadline):
+            medias = await asyncio.wait_for(run_scraping(provider.search_media, query), deadline)
+    except asyncio.TimeoutError:
+        logger.warning("Search on %s missed the %.1fs deadline", name, deadline)
+        return ProviderOutcome(name, [], "timeout", time.perf_counter() - start)
+    except Exception as exc:
+        logger.warning("Search on %s failed: %r", name, exc)
+        return ProviderOutcome(name, [], "error", time.perf_counter() - start, repr(exc))
+    return ProviderOutcome(name, medias, "ok", time.perf_counter() - start)
+
+
+async def search_all(
+    providers: Mapping[str, AbstractProvider],
+    query: str,
+    deadline: float,
+) -> List[ProviderOutcome]:
+    """
+    Search every provider concurrently.
+
+    Args:
+        providers: The providers by name
+        query: The search term
+        deadline: Seconds each provider has to answer
+
+    Returns:
+        One outcome per provider, in the order of ``providers``
+    """
+    return list(await asyncio.gather(*(
+        _search_one(name, provider, query, deadline) for name, provider in providers.items()
+    )))
+
+
+def merge_results(outcomes: List[ProviderOutcome]) -> List[dict]:
+    """
+    Merge the media of several providers, one entry per normalized title.
+
+    Entries keep the order in which their title was first seen, taking the
+    providers in order. Each entry is the first provider's media, tagged
+    with that ``provider``, and lists every site that has it in
+    ``sources``.
+    """
+    merged: Dict[str, dict] = {}
+    for outcome in outcomes:
+        for media in outcome.medias:
+            if not media.title:
+                continue
+            source = {"provider": outcome.name, "url": media.url}
+            key = normalize_title(media.title)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {**media.to_dict(), "provider": outcome.name, "sources": [source]}
+            else:
+                if not entry["image_url"] and media.image_url:
+                    entry["image_url"] = media.image_url
+                entry["sources"].append(source)
+    return list(merged.values())
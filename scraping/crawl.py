@@ -0,0 +1,175 @@
+"""
+Concurrent episode crawling.
+
+Finding the uqload links of a season means visiting every episode page in a
+browser, with clicks, iframe switches and waits. Done one after the other, a
+20-episode season costs the sum of its pages. :func:`crawl_episodes` spreads
+the pages across several workers, each with a driver of its own from the
+pool, so the season costs about as much as its slowest page.
+"""
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from scraping.executor import fresh_context, get_fanout_executor
+from scraping.uqload import video_identity
+
+logger = logging.getLogger(__name__)
+
+_workers = 3
+_lock = threading.Lock()
+# Cap set by `limit_crawl_workers` for the crawls started in a context
+_worker_cap: contextvars.ContextVar[int | None] = contextvars.ContextVar(
+    "crawl_worker_cap", default=None
+)
+
+
+def configure_crawler(workers: int) -> None:
+    """Set how many episode pages of one season are crawled at once."""
+    global _workers
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    with _lock:
+        _workers = workers
+
+
+def get_crawl_workers() -> int:
+    """How many episode pages of one season are crawled at once."""
+    with _lock:
+        return _workers
+
+
+@contextmanager
+def limit_crawl_workers(workers: int) -> Iterator[None]:
+    """
+    Crawl at most ``workers`` episode pages at once in the crawls started
+    within the block, including in the tasks and scraping threads it starts
+    (they inherit the context). Lets background work leave drivers to
+    foreground requests.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    token = _worker_cap.set(workers)
+    try:
+        yield
+    finally:
+        _worker_cap.reset(token)
+
+
+class EpisodeResult:
+    """The candidates found on one episode page, and the crawl's progress."""
+
+    def __init__(self, url: str, index: int, candidates: Iterable[str],
+                 error: BaseException | None, done: int, total: int):
+        self.url = url
+        # Position of the episode in the season
+        self.index = index
+        self.candidates = list(candidates)
+        self.error = error
+        self.done = done
+        self.total = total
+
+    def to_dict(self) -> dict:
+        return {
+            "episode": self.url,
+            "done": self.done,
+            "total": self.total,
+            "found": len(self.candidates),
+            "error": repr(self.error) if self.error else None,
+        }
+
+
+def crawl_episodes(
+    visit: Callable[[str], Iterable[str]],
+    episode_urls: List[str],
+    workers: int | None = None,
+) -> Iterator[EpisodeResult]:
+    """
+    Visit episode pages concurrently, yielding each result as it completes.
+
+    Args:
+        visit: Returns the candidate links of one episode page. It runs on a
+            fan-out thread in a fresh context, so a ``@with_driver`` method
+            checks out its own driver.
+        episode_urls: The pages to visit
+        workers: Pages visited at once (default: `configure_crawler`),
+            capped by `limit_crawl_workers`
+
+    Yields:
+        One `EpisodeResult` per page, in completion order. A page that raised
+        yields its error and no candidates. Closing the iterator early
+        cancels the pages not started yet.
+    """
+    workers = workers or get_crawl_workers()
+    cap = _worker_cap.get()
+    if cap is not None:
+        workers = min(workers, cap)
+    executor = get_fanout_executor()
+    total = len(episode_urls)
+    pending = iter(enumerate(episode_urls))
+    running: Dict[Future, tuple[int, str]] = {}
+    done = 0
+
+    def submit_next() -> None:
+        for index, url in pending:
+            future = executor.submit(fresh_context().run, visit, url)
+            running[future] = (index, url)
+            return
+
+    try:
+        for _ in range(workers):
+            submit_next()
+
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, url = running.pop(future)
+                submit_next()
+                done += 1
+
+                error = future.exception()
+                if error is not None:
+                    logger.warning("Episode crawl failed for %s: %r", url, error)
+                candidates = future.result() if error is None else []
+                logger.debug("Crawled episode %d/%d: %s", done, total, url)
+                yield EpisodeResult(url, index, candidates or [], error, done, total)
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def merge_candidates(
+    results: Iterable[EpisodeResult],
+    normalize: Callable[[str], str | None],
+) -> List[str]:
+    """
+    Normalize and deduplicate the candidates of a crawl, in episode order.
+
+    Args:
+        results: The results of `crawl_episodes`
+        normalize: Maps a candidate to its canonical link, or None to drop it
+
+    Returns:
+        Each distinct video once (links on several mirrors count once, see
+        `scraping.uqload.video_identity`), listed where it first appears in
+        the season
+    """
+    seen_videos = set()
+    links: List[str] = []
+
+    for result in sorted(results, key=lambda result: result.index):
+        for candidate in result.candidates:
+            normalized = normalize(candidate)
+            if not normalized:
+                continue
+            identity = video_identity(normalized)
+            if identity in seen_videos:
+                continue
+            seen_videos.add(identity)
+            links.append(normalized)
+
+    return links
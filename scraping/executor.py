@@ -0,0 +1,190 @@
+"""
+Dedicated executor for blocking, browser-bound scraping work.
+
+Selenium calls block for seconds at a time. Running them on the event loop
+freezes every other request on the worker, and running them on Starlette's
+shared threadpool lets a slow crawl starve unrelated blocking calls. Scraping
+steps are instead dispatched to this executor with :func:`run_scraping` and
+awaited.
+
+A thread can't be cancelled, so a caller that stops waiting (e.g. after
+``asyncio.wait_for`` timed out) would leave its work running, holding an
+executor thread and a driver. Work started under :func:`scraping_deadline`
+instead stops at the next :func:`check_deadline`, which providers call
+before each checkout and navigation.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Iterable, Iterator, Set
+
+_executor: ThreadPoolExecutor | None = None
+_max_workers = 4
+# Fan-out work is submitted from scraping threads; keeping it on its own
+# executor means a scraping thread never waits on a slot of its own pool.
+_fanout_executor: ThreadPoolExecutor | None = None
+_fanout_workers = 16
+_lock = threading.Lock()
+# End of the items given to `fan_out`
+_DONE = object()
+# Monotonic time past which the scraping work of the current context stops
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "scraping_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Scraping work ran past the deadline of the call that started it."""
+
+
+@contextmanager
+def scraping_deadline(seconds: float) -> Iterator[None]:
+    """
+    Stop the scraping work started within the block ``seconds`` from now,
+    at its next `check_deadline`. Work dispatched with `run_scraping`,
+    `fan_out` or the episode crawler inherits the deadline.
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline() -> None:
+    """
+    Raises:
+        DeadlineExceeded: If the deadline of the current context has passed
+    """
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Scraping deadline exceeded")
+
+
+def fresh_context() -> contextvars.Context:
+    """
+    An empty context, for work that must not share the caller's driver
+    lease, carrying over only the caller's deadline.
+    """
+    context = contextvars.Context()
+    deadline = _deadline.get()
+    if deadline is not None:
+        context.run(_deadline.set, deadline)
+    return context
+
+
+def configure_executor(max_workers: int, fanout_workers: int | None = None) -> None:
+    """
+    Set the number of scraping threads, and optionally of fan-out threads
+    (see :func:`fan_out`).
+
+    Takes effect for the executors created next; call it before the first
+    :func:`run_scraping` (or after :func:`shutdown_executor`).
+    """
+    global _max_workers, _fanout_workers
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    if fanout_workers is not None and fanout_workers < 1:
+        raise ValueError("fanout_workers must be at least 1")
+    _max_workers = max_workers
+    if fanout_workers is not None:
+        _fanout_workers = fanout_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the scraping executor, creating it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="scraping"
+            )
+        return _executor
+
+
+async def run_scraping(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking scraping callable on the scraping executor and await it.
+
+    The caller's context variables are propagated, so a driver lease bound in
+    the current context stays visible to ``func``.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Get the fan-out executor, creating it on first use."""
+    global _fanout_executor
+    with _lock:
+        if _fanout_executor is None:
+            _fanout_executor = ThreadPoolExecutor(
+                max_workers=_fanout_workers, thread_name_prefix="fanout"
+            )
+        return _fanout_executor
+
+
+def fan_out(func: Callable[[Any], Any], items: Iterable[Any], concurrency: int) -> Iterator[Future]:
+    """
+    Run ``func`` over ``items`` with at most ``concurrency`` calls in flight,
+    yielding each call's future in input order.
+
+    A new call starts as soon as any call in flight completes, so one slow
+    call holds a single slot rather than the whole window; calls that finish
+    ahead of it wait to be yielded in turn, up to ``concurrency`` of them.
+    Each call runs in a fresh context (see `fresh_context`), so it checks
+    out its own driver rather than sharing the caller's lease. Closing the iterator early (e.g.
+    breaking out of the loop once enough results came in) cancels the calls
+    not yielded yet that have not started, and no further items are
+    submitted.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    executor = get_fanout_executor()
+    pending = iter(items)
+    # Submitted and not yielded yet, in input order
+    window: Deque[Future] = deque()
+    running: Set[Future] = set()
+
+    def fill() -> None:
+        while len(running) < concurrency and len(window) < 2 * concurrency:
+            item = next(pending, _DONE)
+            if item is _DONE:
+                return
+            future = executor.submit(fresh_context().run, func, item)
+            window.append(future)
+            running.add(future)
+
+    try:
+        fill()
+        while window:
+            if not window[0].done():
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                running.difference_update(finished)
+            else:
+                running.discard(window[0])
+                yield window.popleft()
+            fill()
+    finally:
+        for future in window:
+            future.cancel()
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop the scraping executors; new ones are created on next use."""
+    global _executor, _fanout_executor
+    with _lock:
+        executor, _executor = _executor, None
+        fanout, _fanout_executor = _fanout_executor, None
+    for pool in (executor, fanout):
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,82 @@
+"""
+In-process HTML extraction from a single page snapshot.
+
+Every ``find_element`` / ``get_attribute`` call on a Selenium element is a
+WebDriver round trip, so walking 50 result tiles costs hundreds of RPCs.
+Providers instead grab ``driver.page_source`` once, parse it with lxml and run
+compiled XPath selectors against the tree.
+"""
+
+import threading
+from typing import List
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Compiled XPath objects are cached per thread rather than shared between
+# the scraping threads.
+_local = threading.local()
+
+
+def parse_html(source: str, base_url: str | None = None) -> lxml_html.HtmlElement:
+    """
+    Parse an HTML document.
+
+    Args:
+        source: The HTML source
+        base_url: URL the document was loaded from. When given, ``href`` and
+            ``src`` attributes are made absolute, matching what Selenium's
+            ``get_attribute`` returns.
+
+    Returns:
+        The document root element
+    """
+    if not source or not source.strip():
+        source = "<html></html>"
+    document = lxml_html.document_fromstring(source, base_url=base_url)
+    if base_url:
+        document.make_links_absolute(base_url, resolve_base_href=True, handle_failures="ignore")
+    return document
+
+
+def compiled(xpath: str) -> etree.XPath:
+    """Return the compiled form of ``xpath``, compiling it on first use."""
+    cache = getattr(_local, "xpaths", None)
+    if cache is None:
+        cache = _local.xpaths = {}
+    selector = cache.get(xpath)
+    if selector is None:
+        selector = cache[xpath] = etree.XPath(xpath)
+    return selector
+
+
+def select(element, xpath: str) -> List:
+    """All nodes matching ``xpath`` under ``element``."""
+    return compiled(xpath)(element)
+
+
+def select_one(element, xpath: str):
+    """The first node matching ``xpath`` under ``element``, or None."""
+    nodes = compiled(xpath)(element)
+    return nodes[0] if nodes else None
+
+
+def text_of(element) -> str:
+    """
+    The text content of ``element`` with whitespace collapsed, close to what
+    Selenium's ``WebElement.text`` returns.
+    """
+    if element is None:
+        return ""
+    return " ".join(element.text_content().split())
+
+
+def attr(element, *names: str) -> str | None:
+    """The first non-empty attribute among ``names``."""
+    if element is None:
+        return None
+    for name in names:
+        value = element.get(name)
+        if value:
+            return value
+    return None
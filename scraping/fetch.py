@@ -0,0 +1,259 @@
+"""
+HTTP-first page fetching with browser escalation.
+
+A Chrome navigation costs seconds and hundreds of MB, while most season and
+episode listing pages are plain server-rendered HTML. :class:`TieredFetcher`
+first GETs the page over a pooled ``requests`` session carrying the browser's
+user agent and cookies, and only falls back to the WebDriver when the answer
+is a bot challenge or lacks the markup the caller expects. URL shapes that
+needed the browser are remembered for a while so they go straight to it.
+
+That tiered strategy is the default; pages known to need a browser (or to
+never need one) are fetched with the ``BROWSER`` (or ``HTTP``) strategy
+instead.
+"""
+
+import re
+import threading
+import time
+import urllib.parse
+from typing import Dict, Tuple
+
+import requests
+from lxml.html import HtmlElement
+
+from scraping import metrics
+from scraping.executor import check_deadline
+from scraping.extract import parse_html, select
+
+# Substrings of anti-bot interstitials (Cloudflare, DDoS-Guard, ...)
+CHALLENGE_MARKERS = (
+    "cf-chl",
+    "challenge-platform",
+    "cf_chl_opt",
+    "<title>Just a moment...</title>",
+    "Checking your browser",
+    "ddos-guard",
+)
+CHALLENGE_STATUS_CODES = (403, 429, 503)
+
+# Fetch strategies: plain HTTP with browser escalation, browser only, HTTP only
+TIERED = "tiered"
+BROWSER = "browser"
+HTTP = "http"
+FETCH_STRATEGIES = (TIERED, BROWSER, HTTP)
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def url_pattern(url: str) -> str:
+    """
+    Reduce a URL to its shape: host, directories with digit runs folded, and
+    the extension of the last path segment.
+
+    ``https://site/serie/12-foo/3-bar.html`` becomes ``site/serie/#-foo/*.html``.
+    """
+    parsed = urllib.parse.urlparse(url)
+    segments = parsed.path.split("/")
+    *directories, last = segments
+    directories = [_DIGITS_RE.sub("#", segment) for segment in directories]
+    extension = last.rsplit(".", 1)[1] if "." in last else ""
+    shape = "/".join(directories + ["*." + extension if extension else "*"])
+    return f"{parsed.netloc.lower()}{shape}"
+
+
+def is_challenge(status_code: int, html: str) -> bool:
+    """Whether a response looks like an anti-bot challenge instead of content."""
+    if status_code in CHALLENGE_STATUS_CODES:
+        return True
+    head = html[:20000]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class FetchResult:
+    """A fetched and parsed page."""
+
+    def __init__(self, url: str, page: HtmlElement, via: str):
+        self.url = url
+        self.page = page
+        # "http" or "browser"
+        self.via = via
+
+
+class TieredFetcher:
+    """
+    Fetches pages for a provider, over HTTP when possible.
+
+    The provider supplies the WebDriver (through its pool lease), the
+    ``requests`` session (see `scraping.session`) and, when it has them,
+    ``_get_user_agent`` and ``_sync_session_cookies`` helpers. Browser
+    fetches wait for the expected markup through a `scraping.ready.Readiness`.
+    """
+
+    def __init__(
+        self,
+        provider,
+        session: requests.Session,
+        timeout: float = 10.0,
+        browser_pattern_ttl: float = 3600.0,
+        readiness=None,
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            provider: The provider the pages are fetched for
+            session: HTTP session shared with the provider
+            timeout: Seconds allowed for the plain HTTP request
+            browser_pattern_ttl: Seconds a URL shape keeps going straight to
+                the browser before HTTP is tried again
+            readiness: The provider's `Readiness`, so browser fetches share
+                its memory of missing selectors (default: one of its own)
+        """
+        if readiness is None:
+            # Imported here: scraping.ready uses this module's url_pattern
+            from scraping.ready import Readiness
+            readiness = Readiness()
+        self.provider = provider
+        self.session = session
+        self.timeout = timeout
+        self.browser_pattern_ttl = browser_pattern_ttl
+        self.readiness = readiness
+
+        self._lock = threading.Lock()
+        # (url pattern, expected xpath) -> time until which the browser is used
+        self._browser_patterns: Dict[Tuple[str, str], float] = {}
+        self.http_hits = 0
+        self.browser_fetches = 0
+
+    def needs_browser(self, url: str, expect: str) -> bool:
+        """Whether pages shaped like ``url`` are currently routed to the browser."""
+        key = (url_pattern(url), expect)
+        with self._lock:
+            until = self._browser_patterns.get(key)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._browser_patterns[key]
+                return False
+            return True
+
+    def _remember_browser(self, url: str, expect: str) -> None:
+        with self._lock:
+            self._browser_patterns[(url_pattern(url), expect)] = (
+                time.monotonic() + self.browser_pattern_ttl
+            )
+
+    def fetch(
+        self,
+        url: str,
+        expect: str,
+        referer: str | None = None,
+        wait_timeout: float = 6,
+        strategy: str = TIERED,
+    ) -> FetchResult:
+        """
+        Fetch and parse ``url``.
+
+        Args:
+            url: Page to fetch
+            expect: XPath that matches on a correctly rendered page
+            referer: Referer header for the HTTP attempt
+            wait_timeout: Seconds the browser waits at most for ``expect``
+            strategy: ``TIERED``, ``BROWSER`` or ``HTTP``. An ``HTTP`` fetch
+                that fails yields an empty page.
+
+        Returns:
+            The parsed page and which tier produced it
+
+        Raises:
+            DeadlineExceeded: If the scraping deadline has passed
+        """
+        if strategy not in FETCH_STRATEGIES:
+            raise ValueError(f"Unknown fetch strategy: {strategy}")
+        check_deadline()
+        if strategy == BROWSER:
+            return self._fetch_browser(url, expect, wait_timeout)
+        if strategy == HTTP:
+            page, _ = self._fetch_http(url, referer)
+            with self._lock:
+                self.http_hits += page is not None
+            return FetchResult(url, page if page is not None else parse_html(""), "http")
+
+        if not self.needs_browser(url, expect):
+            page, challenged = self._fetch_http(url, referer)
+            if page is not None and not challenged and select(page, expect):
+                with self._lock:
+                    self.http_hits += 1
+                return FetchResult(url, page, "http")
+
+            result = self._fetch_browser(url, expect, wait_timeout)
+            # Only remember the shape when the browser actually did better;
+            # a page that simply lacks the markup is fine over HTTP.
+            if challenged or select(result.page, expect):
+                self._remember_browser(url, expect)
+            elif page is not None:
+                return FetchResult(url, page, "http")
+            return result
+
+        return self._fetch_browser(url, expect, wait_timeout)
+
+    def _headers(self, referer: str | None) -> Dict[str, str]:
+        headers = {
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+        }
+        get_user_agent = getattr(self.provider, "_get_user_agent", None)
+        if get_user_agent is not None:
+            if getattr(self.provider, "_user_agent", ""):
+                headers["User-Agent"] = get_user_agent()
+            else:
+                # Reading it the first time needs a browser; it is cached after.
+                with self.provider._leased():
+                    headers["User-Agent"] = get_user_agent()
+        if referer:
+            headers["Referer"] = referer
+        return headers
+
+    def _sync_cookies(self, url: str) -> None:
+        # Syncing clears the session's cookies for the domain first, so only
+        # do it when a browser is actually checked out to copy them from.
+        sync = getattr(self.provider, "_sync_session_cookies", None)
+        if sync is not None and self.provider._lease.get() is not None:
+            sync(url)
+
+    def _fetch_http(self, url: str, referer: str | None) -> Tuple[HtmlElement | None, bool]:
+        """GET ``url``; returns the parsed page (or None) and whether it was a challenge."""
+        provider_name = type(self.provider).__name__
+        try:
+            self._sync_cookies(url)
+            headers = self._headers(referer)
+            with metrics.span(provider_name, metrics.HTTP_FETCH):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            return None, False
+
+        if "html" not in response.headers.get("Content-Type", "html"):
+            return None, False
+        if is_challenge(response.status_code, response.text):
+            return None, True
+        if not response.ok:
+            return None, False
+        with metrics.span(provider_name, metrics.EXTRACTION):
+            return parse_html(response.text, base_url=response.url), False
+
+    def _fetch_browser(self, url: str, expect: str, wait_timeout: float) -> FetchResult:
+        provider = self.provider
+        with provider._leased():
+            provider._navigate(url)
+            # Stops early once the page settled without the markup
+            with metrics.span(type(provider).__name__, metrics.WAIT):
+                self.readiness.wait_for(provider.driver, expect, wait_timeout)
+            page = provider._snapshot()
+            # Whatever the browser earned (e.g. a cleared challenge) is reused
+            # by the next HTTP attempts.
+            self._sync_cookies(url)
+
+        with self._lock:
+            self.browser_fetches += 1
+        return FetchResult(url, page, "browser")
@@ -0,0 +1,345 @@
+"""
+Process-wide async HTTP client.
+
+Opening a connection per request costs a DNS lookup, a TCP handshake and a
+TLS handshake, often more than the request itself. :class:`AsyncHttpClient`
+is shared by everything that talks to player hosts: one ``httpx`` client
+speaking HTTP/2 where the server offers it, keeping connections alive per
+host, resolving host names through a TTL cache, bounding the requests in
+flight per host, and retrying transport errors and overload answers with
+jittered exponential backoff.
+
+Each event loop using the client gets its own connections. Scraping threads
+use it through :meth:`AsyncHttpClient.request_blocking`, which runs the
+request on an I/O loop thread of the client.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.request
+import weakref
+from typing import Callable, Dict, List, Tuple
+
+import httpcore
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Answers worth retrying: rate limited or the origin overloaded
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class DnsCache:
+    """Host name resolutions kept for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (host, port) -> (addresses, expiry)
+        self._entries: Dict[Tuple[str, int], Tuple[List[str], float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """The addresses of ``host``, in the resolver's order."""
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return [host]
+
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[key] = (addresses, time.monotonic() + self.ttl)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class _CachingBackend(httpcore.AsyncNetworkBackend):
+    """Network backend connecting to the addresses the DNS cache holds."""
+
+    def __init__(self, dns: DnsCache):
+        self._dns = dns
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        # TLS still verifies and sends the host name: it comes from the
+        # request's origin, not from the address connected to.
+        try:
+            addresses = await self._dns.resolve(host, port)
+        except OSError as exc:
+            raise httpcore.ConnectError(f"Can't resolve {host}: {exc}") from exc
+
+        error: Exception | None = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                error = exc
+        # The host may have moved; resolve it again next time
+        self._dns.forget(host, port)
+        raise error or httpcore.ConnectError(f"No address found for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _Transport(httpx.AsyncHTTPTransport):
+    """
+    httpx's transport, resolving host names through the DNS cache.
+
+    httpx has no option for the network backend of its connection pool, so
+    the backend httpcore keeps on the pool is replaced. That attribute is
+    httpcore's own, which is why httpcore is pinned in ``requirements.txt``;
+    if a release moves it, building the transport fails instead of quietly
+    resolving every connection again.
+    """
+
+    def __init__(self, dns: DnsCache, **kwargs):
+        super().__init__(**kwargs)
+        if not isinstance(getattr(self._pool, "_network_backend", None), httpcore.AsyncNetworkBackend):
+            raise RuntimeError(
+                f"httpcore {httpcore.__version__} keeps no network backend on its pool; "
+                "check the httpcore pin in requirements.txt"
+            )
+        self._pool._network_backend = _CachingBackend(dns)
+
+
+def _proxy_mounts(transport: Callable[..., httpx.AsyncBaseTransport]) -> Dict[str, httpx.AsyncBaseTransport]:
+    """
+    Transports for the proxies set in the environment (``HTTP_PROXY``,
+    ``HTTPS_PROXY``, ``NO_PROXY``), which httpx only applies itself to
+    clients using its default transport.
+    """
+    proxies = urllib.request.getproxies()
+    no_proxy = [host.strip() for host in proxies.get("no", "").split(",") if host.strip()]
+    if "*" in no_proxy:
+        return {}
+
+    mounts: Dict[str, httpx.AsyncBaseTransport] = {}
+    for scheme in ("http", "https"):
+        if scheme in proxies:
+            mounts[f"{scheme}://"] = transport(proxy=proxies[scheme])
+    if mounts:
+        direct = transport()
+        for host in no_proxy:
+            pattern = "*" + host.lstrip(".") if host.startswith(".") else host
+            mounts[f"all://{pattern}"] = direct
+    return mounts
+
+
+class AsyncHttpClient:
+    """Pooled, retrying HTTP client shared by the whole process."""
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        per_host: int = 8,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.25,
+        max_backoff: float = 4.0,
+        dns_ttl: float = 300.0,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            http2: Whether to offer HTTP/2 to servers that support it
+            max_connections: Connections open at most, across hosts
+            max_keepalive: Idle connections kept alive at most
+            keepalive_expiry: Seconds an idle connection is kept
+            per_host: Requests in flight at most against a single host
+            timeout: Seconds allowed for connecting, and for each read
+            retries: Retries of a request after a transport error or an
+                overload answer (see ``RETRY_STATUS_CODES``)
+            backoff: Seconds the first retry waits at most; doubled per retry
+            max_backoff: Seconds a retry waits at most
+            dns_ttl: Seconds a host name resolution is reused
+        """
+        if per_host < 1:
+            raise ValueError("per_host must be at least 1")
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.dns = DnsCache(dns_ttl)
+        # Created once: building an SSL context costs tens of milliseconds
+        self._ssl_context = httpx.create_ssl_context()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0}
+        # httpx clients and semaphores only work on the event loop that
+        # created them, so each loop using the client gets its own.
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Event loop thread serving `request_blocking`, started on first use
+        self._io_loop: asyncio.AbstractEventLoop | None = None
+
+    def _transport(self, proxy: str | None = None) -> httpx.AsyncBaseTransport:
+        return _Transport(
+            self.dns, verify=self._ssl_context, http2=self.http2, limits=self.limits,
+            proxy=httpx.Proxy(proxy) if proxy else None,
+        )
+
+    def _state(self) -> "_LoopState":
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(httpx.AsyncClient(
+                transport=self._transport(),
+                mounts=_proxy_mounts(self._transport),
+                timeout=self.timeout,
+            ))
+        return state
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "dns_hits": self.dns.hits, "dns_misses": self.dns.misses}
+
+    def _delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before retry ``attempt`` + 1: full jitter under the backoff."""
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, honouring the per-host limit and retrying.
+
+        Takes the keyword arguments of ``httpx.AsyncClient.request``.
+
+        Raises:
+            httpx.TransportError: If the last attempt failed to get an answer
+        """
+        state = self._state()
+        host = httpx.URL(url).host
+        semaphore = state.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = state.host_semaphores[host] = asyncio.Semaphore(self.per_host)
+
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                async with semaphore:
+                    response = await state.client.request(method, url, **kwargs)
+            except httpx.TransportError as exc:
+                if attempt >= self.retries:
+                    self._count("failures")
+                    raise
+                logger.debug("%s %s failed (%r), retrying", method, url, exc)
+                delay = self._delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+                delay = self._delay(attempt, response.headers.get("Retry-After"))
+            attempt += 1
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def request_blocking(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request from a thread outside any event loop and wait for the
+        answer. The request runs on the client's own I/O loop thread.
+
+        Raises:
+            RuntimeError: If called on an event loop; await `request` there
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("request_blocking would block the event loop; await request")
+
+        with self._lock:
+            if self._io_loop is None:
+                self._io_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._io_loop.run_forever, name="http-client", daemon=True
+                ).start()
+            loop = self._io_loop
+        return asyncio.run_coroutine_threadsafe(self.request(method, url, **kwargs), loop).result()
+
+    async def aclose(self) -> None:
+        """Close the connections of the running loop and stop the I/O loop thread."""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+        with self._lock:
+            loop, self._io_loop = self._io_loop, None
+        if loop is not None:
+            state = self._states.pop(loop, None)
+            if state is not None:
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(state.client.aclose(), loop)
+                )
+            loop.call_soon_threadsafe(loop.stop)
+
+
+class _LoopState:
+    """The httpx client and per-host semaphores of one event loop."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+# Global HTTP client, replaced by `configure_http_client`
+_global_client = AsyncHttpClient()
+
+
+def get_http_client() -> AsyncHttpClient:
+    """Get the global HTTP client."""
+    return _global_client
+
+
+def configure_http_client(**kwargs) -> AsyncHttpClient:
+    """Replace the global HTTP client with one using the given settings (see `AsyncHttpClient`)."""
+    global _global_client
+    _global_client = AsyncHttpClient(**kwargs)
+    return _global_client
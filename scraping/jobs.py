@@ -0,0 +1,296 @@
+"""
+Batch video link jobs.
+
+Resolving a whole watchlist one ``/get-videos`` call at a time leaves the
+driver pool idle between calls. :class:`JobQueue` takes many (provider,
+media URL) pairs at once as a :class:`Job`, puts them on a priority queue and
+works through it with a fixed number of workers, so the pool stays busy and
+clients poll or stream the results. Items the video cache already holds
+skip the queue.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Tuple
+
+from cache import get_cache
+from models.uqvideo import UqVideo
+from providers.provider import AbstractProvider
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities: lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobItem:
+    """One (provider, media URL) pair of a job and its outcome."""
+
+    def __init__(self, index: int, provider_name: str, media_url: str):
+        # Position of the item in the job
+        self.index = index
+        self.provider_name = provider_name
+        self.media_url = media_url
+        self.status = QUEUED
+        self.videos: List[UqVideo] = []
+        self.error: str | None = None
+        # Whether the videos came straight from the video cache
+        self.cached = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "provider_name": self.provider_name,
+            "media_url": self.media_url,
+            "status": self.status,
+            "cached": self.cached,
+            "error": self.error,
+            "results": [video.to_dict() for video in self.videos],
+        }
+
+
+class Job:
+    """A batch of items resolved by the queue."""
+
+    def __init__(self, items: List[JobItem], priority: int):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.priority = priority
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        # Finished items, in completion order
+        self._completed: List[JobItem] = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return len(self._completed) == len(self.items)
+
+    @property
+    def status(self) -> str:
+        if self.done:
+            return DONE
+        if self._completed or any(item.status == RUNNING for item in self.items):
+            return RUNNING
+        return QUEUED
+
+    async def _finish(self, item: JobItem) -> None:
+        self._completed.append(item)
+        if self.done:
+            self.finished_at = time.time()
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def completed(self) -> AsyncIterator[JobItem]:
+        """Yield each item as it finishes, in completion order, until all have."""
+        sent = 0
+        while True:
+            while sent < len(self._completed):
+                yield self._completed[sent]
+                sent += 1
+            if self.done:
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self._completed) > sent)
+
+    def to_dict(self, include_items: bool = True) -> dict:
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        for item in self.items:
+            counts[item.status] += 1
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "total": len(self.items),
+            "counts": counts,
+            "cached": sum(item.cached for item in self.items),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_items:
+            data["items"] = [item.to_dict() for item in self.items]
+        return data
+
+
+class JobQueue:
+    """
+    Runs the items of batch jobs through the providers with bounded
+    concurrency, most urgent job first.
+    """
+
+    def __init__(
+        self,
+        providers: Mapping[str, AbstractProvider],
+        concurrency: int = 3,
+        retention: float = 3600.0,
+        max_jobs: int = 1000,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            providers: The providers items may name
+            concurrency: Items resolved at once
+            retention: Seconds a finished job stays available
+            max_jobs: Jobs kept at most; the oldest finished ones go first
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.providers = providers
+        self.concurrency = concurrency
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._running = 0
+        # Queue and workers are bound to the event loop that first submits.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.PriorityQueue | None = None
+        self._workers: List[asyncio.Task] = []
+        self._background: set = set()
+
+    def _ensure_workers(self) -> asyncio.PriorityQueue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._workers = [loop.create_task(self._work()) for _ in range(self.concurrency)]
+        return self._queue
+
+    def submit(self, pairs: Iterable[Tuple[str, str]], priority: int = PRIORITY_NORMAL) -> Job:
+        """
+        Create a job for (provider name, media URL) pairs and queue its items.
+
+        Must be called from the event loop. Items naming an unknown provider
+        fail at once; items the video cache holds are answered from it
+        without waiting in the queue.
+
+        Returns:
+            The job; its id is used to poll or stream it
+        """
+        queue = self._ensure_workers()
+        job = Job(
+            [JobItem(index, provider_name, url) for index, (provider_name, url) in enumerate(pairs)],
+            priority,
+        )
+        self._remember(job)
+
+        cache = get_cache()
+        for item in job.items:
+            provider = self.providers.get(item.provider_name)
+            if provider is None:
+                item.status = FAILED
+                item.error = f"Invalid provider. Available providers: {', '.join(self.providers)}"
+                self._spawn(job._finish(item))
+            elif cache.contains(item.media_url, type(provider).__name__):
+                item.cached = True
+                self._spawn(self._run(job, item))
+            else:
+                queue.put_nowait((priority, next(self._sequence), job, item))
+        return job
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def get(self, job_id: str) -> Job | None:
+        """The job with that id, unless it finished too long ago."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "running": self._running,
+                "concurrency": self.concurrency,
+            }
+
+    def close(self) -> None:
+        """Stop the workers; queued items are left unresolved."""
+        for task in self._workers + list(self._background):
+            task.cancel()
+        self._workers = []
+        self._loop = None
+
+    def _remember(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired finished jobs, then the oldest finished ones over ``max_jobs``. Lock held."""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if job.done:
+                del self._jobs[job_id]
+
+    async def _work(self) -> None:
+        while True:
+            _, _, job, item = await self._queue.get()
+            try:
+                await self._run(job, item)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, item: JobItem) -> None:
+        provider = self.providers[item.provider_name]
+        item.status = RUNNING
+        with self._lock:
+            self._running += 1
+        try:
+            item.videos = await provider.get_uqvideos_from_media_url(item.media_url)
+            item.status = DONE
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Batch item %s failed: %r", item.media_url, exc)
+            item.status = FAILED
+            item.error = str(exc)
+        finally:
+            with self._lock:
+                self._running -= 1
+        await job._finish(item)
+
+
+# Global job queue, set up by `configure_job_queue`
+_global_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue | None:
+    """Get the global job queue, or None before it is configured."""
+    return _global_queue
+
+
+def configure_job_queue(providers: Mapping[str, AbstractProvider], **kwargs) -> JobQueue:
+    """Replace the global job queue with one over ``providers``."""
+    global _global_queue
+    if _global_queue is not None:
+        _global_queue.close()
+    _global_queue = JobQueue(providers, **kwargs)
+    return _global_queue
@@ -0,0 +1,98 @@
+"""
+Fast uqload link scanning of HTML.
+
+Player pages mention uqload in three ways: a ``sources: [...]`` array of a
+JavaScript player, embed URLs in iframes or attributes, and a bare
+``file_code=`` parameter. Pages can be several hundred KB and are scanned
+once per iframe, so rather than running a regular expression over the whole
+document, :func:`extract_uqload_links` only looks for the literal anchors
+``uqload`` and ``file_code=``, a memchr-speed scan, and inspects the few
+bytes around each hit: the URL that contains it, and whether that URL sits
+in a sources array. Every occurrence is found, not only the first. A URL
+carried inside another one (``?u=https://uqload...``) is read from its own
+start, the closest one before the hit.
+
+Links are found in any letter case. The anchors are looked for in an
+ASCII-lowercased copy of the page, which keeps every offset: one extra
+pass at copy speed, where case-insensitive anchor patterns lose the
+literal scan and run about ten times slower. Everything else is read from
+the page itself.
+
+Documents can be given as ``bytes`` or ``bytearray`` (a raw HTTP body),
+copied once for the lowercase pass, or as ``memoryview`` or ``str``
+(Selenium's ``page_source``), which are first turned into bytes (a second
+copy). Only the links found are decoded.
+"""
+
+import re
+from typing import Set, Union
+
+from scraping.uqload import embed_url
+
+Document = Union[str, bytes, bytearray, memoryview]
+
+# How far before an anchor a URL may start, and a sources array open
+_URL_LOOKBEHIND = 2048
+_SOURCES_LOOKBEHIND = 4096
+
+# Matched against the lowercased copy of the document
+_ANCHOR_RE = re.compile(rb"uqload")
+_FILE_CODE_RE = re.compile(rb"file_code=([a-z0-9]+)")
+# Matched against the document itself. The URL around an anchor: its start,
+# up to the anchor, and its remainder
+_URL_HEAD_RE = re.compile(rb"""https?://[^\s"'<>]*\Z""", re.IGNORECASE)
+_URL_START_RE = re.compile(rb"https?://", re.IGNORECASE)
+_URL_TAIL_RE = re.compile(rb"""[^\s"'<>]*""")
+_EMBED_RE = re.compile(rb"https?://(?:www\.)?uqload\.[a-z]+/embed-", re.IGNORECASE)
+# A sources array still open where a URL starts
+_SOURCES_RE = re.compile(rb"sources?\s*:\s*\[[^\]]*\Z", re.IGNORECASE)
+
+
+def _text(document: bytes | bytearray, start: int, end: int) -> str:
+    return bytes(document[start:end]).decode("utf-8", "replace")
+
+
+def extract_uqload_links(document: Document | None) -> Set[str]:
+    """
+    Every uqload link candidate of an HTML document.
+
+    Finds the embed URLs, the uqload URLs listed in ``sources`` arrays, and
+    the ``file_code=`` parameters, which become an embed URL on the first
+    mirror (the resolver falls back to the others). Normalize the result
+    with `scraping.uqload.normalize_embed_url`.
+    """
+    if not document:
+        return set()
+    if isinstance(document, str):
+        document = document.encode("utf-8", "surrogatepass")
+    if isinstance(document, memoryview):
+        document = document.tobytes()
+    # ASCII-only lowering: same length, so offsets hold in both
+    lowered = document.lower()
+
+    links: Set[str] = set()
+    # End of the last URL read, so anchors inside it are skipped
+    covered = 0
+    for anchor in _ANCHOR_RE.finditer(lowered):
+        position = anchor.start()
+        if position < covered:
+            continue
+        head = _URL_HEAD_RE.search(document, max(0, position - _URL_LOOKBEHIND), position)
+        if head is None:
+            continue
+        # The innermost URL holding the anchor, not one it is nested in
+        start = head.start()
+        for nested in _URL_START_RE.finditer(document, start + 1, position):
+            start = nested.start()
+        covered = _URL_TAIL_RE.match(document, position).end()
+
+        if _EMBED_RE.match(document, start, covered) or _SOURCES_RE.search(
+            document, max(0, start - _SOURCES_LOOKBEHIND), start
+        ):
+            links.add(_text(document, start, covered))
+
+    for match in _FILE_CODE_RE.finditer(lowered):
+        # File codes are case sensitive: read them from the document
+        links.add(embed_url(_text(document, *match.span(1))))
+
+    return links
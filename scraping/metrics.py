@@ -0,0 +1,122 @@
+"""
+Prometheus metrics for the scraping pipeline.
+
+Providers time each step of their work with :func:`span`, which feeds a
+histogram labelled by provider and stage and counts the errors that escape
+it. Cache and driver pool figures are read from their ``stats()`` when
+``/metrics`` is scraped, so neither needs to know about Prometheus.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Stages timed by the providers
+NAVIGATION = "navigation"
+WAIT = "wait"
+EXTRACTION = "extraction"
+IFRAME_SCAN = "iframe_scan"
+HTTP_FETCH = "http_fetch"
+UQLOAD_RESOLUTION = "uqload_resolution"
+# Only used to label errors
+SEARCH = "search"
+EPISODE_CRAWL = "episode_crawl"
+
+STAGE_SECONDS = Histogram(
+    "scraping_stage_duration_seconds",
+    "Time spent in each scraping stage",
+    ["provider", "stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+ERRORS = Counter(
+    "scraping_errors_total",
+    "Errors raised or swallowed while scraping",
+    ["provider", "stage"],
+)
+
+
+@contextmanager
+def span(provider_name: str, stage: str) -> Iterator[None]:
+    """
+    Time the block as ``stage`` of ``provider_name``.
+
+    The duration is recorded whether the block succeeds or raises; an
+    exception is also counted as an error of that stage and re-raised.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(provider_name, stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(provider_name, stage).observe(time.perf_counter() - start)
+
+
+def record_error(provider_name: str, stage: str) -> None:
+    """Count an error that was handled rather than raised."""
+    ERRORS.labels(provider_name, stage).inc()
+
+
+class _StatsCollector:
+    """Exposes ``stats()`` dictionaries as metrics at scrape time."""
+
+    def __init__(self, collect: Callable[[], list]):
+        self._collect = collect
+
+    def collect(self):
+        return self._collect()
+
+
+def _cache_metrics(get_stats: Callable[[], Dict[str, int]]) -> list:
+    stats = get_stats()
+    metrics = []
+    for name in ("hits", "stale_hits", "misses", "evictions", "expirations"):
+        if name in stats:
+            metrics.append(CounterMetricFamily(
+                f"video_cache_{name}", f"Video cache {name.replace('_', ' ')}", value=stats[name]
+            ))
+    metrics.append(GaugeMetricFamily("video_cache_entries", "Entries in the video cache",
+                                     value=stats.get("entries", 0)))
+    metrics.append(GaugeMetricFamily("video_cache_bytes", "Estimated size of the video cache",
+                                     value=stats.get("bytes", 0)))
+    return metrics
+
+
+def _pool_metrics(get_stats: Callable[[], Dict[str, int]]) -> list:
+    stats = get_stats()
+    drivers = GaugeMetricFamily("driver_pool_drivers", "Drivers in the pool by state",
+                                labels=["state"])
+    drivers.add_metric(["idle"], stats.get("idle", 0))
+    drivers.add_metric(["in_use"], stats.get("in_use", 0))
+    max_size = stats.get("max_size", 0)
+    return [
+        drivers,
+        GaugeMetricFamily("driver_pool_max_size", "Maximum number of drivers", value=max_size),
+        GaugeMetricFamily("driver_pool_waiting", "Callers waiting for a driver",
+                          value=stats.get("waiting", 0)),
+        GaugeMetricFamily("driver_pool_utilization", "Share of the maximum pool size in use",
+                          value=stats.get("in_use", 0) / max_size if max_size else 0.0),
+        CounterMetricFamily("driver_pool_drivers_started", "Drivers started",
+                            value=stats.get("created", 0)),
+        CounterMetricFamily("driver_pool_drivers_recycled", "Drivers quit and replaced",
+                            value=stats.get("recycled", 0)),
+    ]
+
+
+def register_cache_metrics(get_stats: Callable[[], Dict[str, int]]) -> None:
+    """Expose the counters of a cache's ``stats()`` (e.g. ``lambda: get_cache().stats()``)."""
+    REGISTRY.register(_StatsCollector(lambda: _cache_metrics(get_stats)))
+
+
+def register_pool_metrics(get_stats: Callable[[], Dict[str, int]]) -> None:
+    """Expose the utilization of a driver pool from its ``stats()``."""
+    REGISTRY.register(_StatsCollector(lambda: _pool_metrics(get_stats)))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """The current metrics in the Prometheus text format, and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,341 @@
+"""
+Pooled Selenium WebDriver management.
+
+Instead of sharing one module-level Chrome instance between every provider,
+each scraping operation checks a driver out of a :class:`DriverPool`, uses it
+exclusively, and checks it back in. The pool keeps between ``min_size`` and
+``max_size`` browsers alive, health-checks idle ones, recycles browsers after
+a number of navigations or after a crash, and prefers handing a provider the
+browser it used last (its cookies and HTTP cache are already warm).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager, suppress
+from typing import Callable, Dict, Iterator, List
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no driver became available before the checkout deadline."""
+
+
+class PooledDriver:
+    """A WebDriver owned by the pool, together with its bookkeeping."""
+
+    def __init__(self, driver: webdriver.Chrome, driver_id: int):
+        self.driver = driver
+        self.id = driver_id
+        self.navigations = 0
+        self.affinity: str | None = None
+        self.broken = False
+        self.last_used = time.monotonic()
+
+
+class Lease:
+    """
+    Exclusive use of one pooled driver.
+
+    Obtained from :meth:`DriverPool.checkout` and handed back with
+    :meth:`DriverPool.checkin` (or managed by :meth:`DriverPool.lease`).
+    """
+
+    def __init__(self, pool: "DriverPool", pooled: PooledDriver, affinity: str | None):
+        self.pool = pool
+        self.affinity = affinity
+        self._pooled = pooled
+        self.released = False
+
+    @property
+    def driver(self) -> webdriver.Chrome:
+        return self._pooled.driver
+
+    @property
+    def navigations(self) -> int:
+        return self._pooled.navigations
+
+    def navigate(self, url: str) -> None:
+        """Load ``url`` in the leased browser, counting it towards recycling."""
+        self._pooled.navigations += 1
+        try:
+            self._pooled.driver.get(url)
+        except WebDriverException:
+            # Providers tend to swallow navigation errors, so check here
+            # whether the browser itself went away.
+            try:
+                self._pooled.driver.execute_script("return 1;")
+            except Exception:
+                self.mark_broken()
+            raise
+
+    def mark_broken(self) -> None:
+        """Flag the driver so it is discarded instead of returned to the pool."""
+        self._pooled.broken = True
+
+
+class DriverPool:
+    """
+    Thread-safe pool of Selenium WebDrivers.
+
+    Drivers are created lazily by ``factory`` up to ``max_size``; ``min_size``
+    of them are started eagerly by :meth:`start` and replenished when one is
+    recycled.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], webdriver.Chrome],
+        min_size: int = 1,
+        max_size: int = 2,
+        max_navigations: int = 200,
+        checkout_timeout: float = 120.0,
+        health_check_interval: float = 60.0,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Callable returning a new, ready-to-use WebDriver
+            min_size: Number of drivers kept alive at all times
+            max_size: Upper bound on concurrently running drivers
+            max_navigations: Navigations after which a driver is recycled
+            checkout_timeout: Default seconds to wait for a free driver
+            health_check_interval: Idle seconds after which a driver is
+                probed before being handed out
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_navigations = max_navigations
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._in_use: Dict[int, PooledDriver] = {}
+        # Drivers alive or currently being started.
+        self._size = 0
+        self._next_id = 0
+        self._waiting = 0
+        self._closed = False
+        self._created = 0
+        self._recycled = 0
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        """Start ``min_size`` drivers so the first requests don't pay for it."""
+        self._replenish()
+
+    def close(self) -> None:
+        """Quit every driver. Leased drivers are quit when checked back in."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._lock.notify_all()
+
+        for pooled in idle:
+            self._quit(pooled)
+
+    # --- Checkout / checkin ---
+
+    def checkout(self, affinity: str | None = None, timeout: float | None = None) -> Lease:
+        """
+        Take a driver out of the pool.
+
+        An idle driver last used with the same ``affinity`` is preferred, then
+        any idle driver, then a freshly started one if the pool is below
+        ``max_size``. Otherwise the call blocks until a driver is checked in.
+
+        Args:
+            affinity: Key (usually the provider name) used to route the caller
+                back to the browser it used before
+            timeout: Seconds to wait for a driver (default: ``checkout_timeout``)
+
+        Returns:
+            A lease on the driver
+
+        Raises:
+            PoolTimeout: If no driver became available in time
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pooled = self._acquire(affinity, deadline)
+            if pooled is None:
+                pooled = self._spawn()
+            elif not self._is_healthy(pooled):
+                self._discard(pooled)
+                continue
+
+            pooled.affinity = affinity
+            with self._lock:
+                self._in_use[pooled.id] = pooled
+            return Lease(self, pooled, affinity)
+
+    def checkin(self, lease: Lease, broken: bool = False) -> None:
+        """
+        Return a leased driver to the pool.
+
+        Drivers that crashed, were marked broken or reached
+        ``max_navigations`` are quit and replaced instead of reused.
+        """
+        if lease.released:
+            return
+        lease.released = True
+        pooled = lease._pooled
+        pooled.last_used = time.monotonic()
+        if broken:
+            pooled.broken = True
+
+        with self._lock:
+            self._in_use.pop(pooled.id, None)
+            reusable = (
+                not self._closed
+                and not pooled.broken
+                and pooled.navigations < self.max_navigations
+            )
+            if reusable:
+                self._idle.append(pooled)
+                self._lock.notify()
+                return
+
+        self._discard(pooled)
+
+    @contextmanager
+    def lease(self, affinity: str | None = None, timeout: float | None = None) -> Iterator[Lease]:
+        """
+        Context manager around :meth:`checkout` / :meth:`checkin`.
+
+        A ``WebDriverException`` escaping the block marks the driver as
+        broken, since the browser or its session is the likely culprit.
+        """
+        lease = self.checkout(affinity=affinity, timeout=timeout)
+        try:
+            yield lease
+        except WebDriverException:
+            lease.mark_broken()
+            raise
+        finally:
+            self.checkin(lease)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the pool's occupancy."""
+        with self._lock:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "max_size": self.max_size,
+                "created": self._created,
+                "recycled": self._recycled,
+            }
+
+    # --- Internals ---
+
+    def _acquire(self, affinity: str | None, deadline: float) -> PooledDriver | None:
+        """
+        Pop an idle driver, or reserve a slot for a new one (returns None).
+        """
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Driver pool is closed")
+
+                if self._idle:
+                    for index in range(len(self._idle) - 1, -1, -1):
+                        if self._idle[index].affinity == affinity:
+                            return self._idle.pop(index)
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No WebDriver available after waiting (max_size={self.max_size})"
+                    )
+                self._waiting += 1
+                try:
+                    self._lock.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _spawn(self) -> PooledDriver:
+        """Start a driver for a slot already reserved in ``_size``."""
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._next_id += 1
+            self._created += 1
+            return PooledDriver(driver, self._next_id)
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        """Probe drivers that sat idle for a while; recently used ones are trusted."""
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            pooled.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled: PooledDriver) -> None:
+        """Quit a driver, free its slot and top the pool back up to ``min_size``."""
+        with self._lock:
+            self._size -= 1
+            self._recycled += 1
+            self._lock.notify()
+
+        self._quit(pooled)
+        threading.Thread(target=self._replenish, daemon=True).start()
+
+    def _replenish(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+
+            try:
+                pooled = self._spawn()
+            except Exception:
+                # `_spawn` has given the slot back
+                logger.warning("Error starting WebDriver", exc_info=True)
+                return
+
+            with self._lock:
+                if self._closed:
+                    self._size -= 1
+                else:
+                    self._idle.append(pooled)
+                    self._lock.notify()
+                    continue
+            self._quit(pooled)
+            return
+
+    @staticmethod
+    def _quit(pooled: PooledDriver) -> None:
+        with suppress(Exception):
+            pooled.driver.quit()
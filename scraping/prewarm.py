@@ -0,0 +1,157 @@
+"""
+Background pre-warming of popular video links.
+
+The first ``/get-videos`` call after an entry's TTL runs out pays for a full
+crawl. :class:`Prewarmer` periodically takes the most requested (provider,
+media URL) pairs from the request tracker and resolves again those about to
+turn stale, so popular titles are always served from the cache. It is a low
+priority client: it only starts a refresh while the driver pool has room to
+spare, one at a time, and no more often per site than its rate limit. A
+refresh crawls with at most the drivers that were spare when it started.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Mapping
+
+from cache import get_cache, get_request_tracker, refresh_video_links
+from providers.provider import AbstractProvider
+from scraping.crawl import limit_crawl_workers
+from scraping.pool import DriverPool
+
+logger = logging.getLogger(__name__)
+
+
+class Prewarmer:
+    """Keeps the most requested video link entries fresh."""
+
+    def __init__(
+        self,
+        providers: Mapping[str, AbstractProvider],
+        pool: DriverPool,
+        top_k: int = 20,
+        lead_time: float = 300.0,
+        interval: float = 60.0,
+        min_requests: float = 3.0,
+        rate_per_minute: float = 4.0,
+        decay: float = 0.95,
+        reserved_drivers: int = 1,
+    ):
+        """
+        Initialize the pre-warmer.
+
+        Args:
+            providers: The providers whose entries are refreshed
+            pool: The driver pool; refreshes only start while it has room
+            top_k: How many of the most requested pairs are considered
+            lead_time: Seconds before turning stale that an entry is refreshed
+            interval: Seconds between two rounds
+            min_requests: Decayed request count a pair needs to be refreshed
+            rate_per_minute: Refreshes started per minute at most, per site
+            decay: Factor applied to the request counts every round
+            reserved_drivers: Drivers left to foreground requests; no
+                refresh starts while fewer are free, and a refresh crawls
+                with the free drivers beyond them only
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        # The tracker knows providers by class name, like the cache
+        self.providers: Dict[str, AbstractProvider] = {
+            type(provider).__name__: provider for provider in providers.values()
+        }
+        self.pool = pool
+        self.top_k = top_k
+        self.lead_time = lead_time
+        self.interval = interval
+        self.min_requests = min_requests
+        self.min_gap = 60.0 / rate_per_minute
+        self.decay = decay
+        self.reserved_drivers = reserved_drivers
+        # provider name -> monotonic time of the last refresh started
+        self._last_refresh: Dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._stats = {"rounds": 0, "refreshed": 0, "failed": 0, "deferred_busy": 0,
+                       "deferred_rate_limit": 0}
+
+    def start(self) -> None:
+        """Start the background rounds on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {**self._stats, "tracked": len(get_request_tracker())}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Pre-warming round failed: %r", exc)
+
+    def _spare_drivers(self) -> int:
+        """Drivers free beyond the reserved ones, 0 while requests wait for one."""
+        stats = self.pool.stats()
+        if stats.get("waiting", 0) > 0:
+            return 0
+        free = stats.get("max_size", 0) - stats.get("in_use", 0)
+        return max(0, free - self.reserved_drivers)
+
+    def _due(self, provider_name: str, url: str) -> bool:
+        fresh_for = get_cache().fresh_for(url, provider_name)
+        return fresh_for is None or fresh_for <= self.lead_time
+
+    async def run_once(self) -> int:
+        """
+        Run one round: refresh, one after the other, the popular entries
+        that are about to turn stale.
+
+        Returns:
+            Number of entries refreshed
+        """
+        self._stats["rounds"] += 1
+        tracker = get_request_tracker()
+        candidates = [
+            (provider_name, url)
+            for provider_name, url, score in tracker.top(self.top_k)
+            if score >= self.min_requests and provider_name in self.providers
+        ]
+        tracker.decay(self.decay)
+
+        refreshed = 0
+        for provider_name, url in candidates:
+            if not self._due(provider_name, url):
+                continue
+            spare = self._spare_drivers()
+            if not spare:
+                # Foreground requests come first; try again next round
+                self._stats["deferred_busy"] += 1
+                break
+            last = self._last_refresh.get(provider_name)
+            if last is not None and time.monotonic() - last < self.min_gap:
+                self._stats["deferred_rate_limit"] += 1
+                continue
+
+            self._last_refresh[provider_name] = time.monotonic()
+            try:
+                # The episode crawl would otherwise use the whole pool
+                with limit_crawl_workers(spare):
+                    await refresh_video_links(self.providers[provider_name], url)
+            except Exception as exc:
+                logger.info("Pre-warming %s (%s) failed: %r", url, provider_name, exc)
+                self._stats["failed"] += 1
+                continue
+            refreshed += 1
+            self._stats["refreshed"] += 1
+
+        if refreshed:
+            logger.info("Pre-warmed %d video link entries", refreshed)
+        return refreshed
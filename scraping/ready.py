@@ -0,0 +1,217 @@
+"""
+Event-driven page readiness.
+
+Fixed ``time.sleep`` calls after navigations, clicks and frame switches wait
+the same time whether the page is long done or still loading, and waiting for
+a selector that a page simply does not have burns the whole timeout.
+:class:`Readiness` instead injects a small script that records DOM mutations
+and in-flight ``fetch``/XHR requests, polls it at a short interval, and
+returns as soon as the page has gone quiet. Selectors that turned out to be
+missing on several pages of one shape are remembered for a while, so the
+next page of that shape only gets a single check for them.
+"""
+
+import threading
+import time
+from typing import Dict, List, Set, Tuple
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+from scraping.fetch import url_pattern
+
+# Installs the observer once per document. `__sdlReady.quiet()` returns how
+# long (ms) the DOM has been unchanged, `pending` the open requests.
+INSTALL_SCRIPT = """
+if (!window.__sdlReady) {
+    var state = window.__sdlReady = {last: performance.now(), pending: 0};
+    state.quiet = function () { return performance.now() - state.last; };
+    var touch = function () { state.last = performance.now(); };
+    new MutationObserver(touch).observe(document, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ["src", "href"]
+    });
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            state.pending++;
+            touch();
+            return fetch.apply(this, arguments).finally(function () {
+                state.pending--;
+                touch();
+            });
+        };
+    }
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        state.pending++;
+        touch();
+        this.addEventListener("loadend", function () {
+            state.pending--;
+            touch();
+        });
+        return send.apply(this, arguments);
+    };
+}
+"""
+
+STATE_SCRIPT = """
+var state = window.__sdlReady;
+return [
+    document.readyState,
+    state ? state.quiet() : 0,
+    state ? state.pending : 0
+];
+"""
+
+
+class Readiness:
+    """
+    Waits for pages loaded in a WebDriver to be ready, for one provider.
+
+    The "expected absent" memory is keyed by URL shape (see
+    `scraping.fetch.url_pattern`) and selector. One page without a player
+    says little about its siblings, so a shape only gets it once the
+    selector was missing on ``absent_after`` distinct pages of that shape,
+    with no page in between having it.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 0.05,
+        quiet_period: float = 0.3,
+        absent_ttl: float = 300.0,
+        absent_after: int = 3,
+    ):
+        """
+        Initialize the readiness helper.
+
+        Args:
+            poll_interval: Seconds between two checks of the page
+            quiet_period: Seconds without DOM changes or open requests after
+                which a page counts as settled
+            absent_ttl: Seconds a selector found missing on a page shape is
+                only checked once on pages of that shape
+            absent_after: Distinct pages of a shape a selector must be
+                missing on before that
+        """
+        if absent_after < 1:
+            raise ValueError("absent_after must be at least 1")
+        self.poll_interval = poll_interval
+        self.quiet_period = quiet_period
+        self.absent_ttl = absent_ttl
+        self.absent_after = absent_after
+        self._lock = threading.Lock()
+        # (url pattern, xpath) -> time until which the selector is expected absent
+        self._absent: Dict[Tuple[str, str], float] = {}
+        # (url pattern, xpath) -> pages found without the selector since it was last seen
+        self._misses: Dict[Tuple[str, str], Set[str]] = {}
+
+    def _install(self, driver) -> None:
+        try:
+            driver.execute_script(INSTALL_SCRIPT)
+        except WebDriverException:
+            pass
+
+    def _state(self, driver) -> Tuple[str, float, int]:
+        try:
+            ready_state, quiet_ms, pending = driver.execute_script(STATE_SCRIPT)
+        except (WebDriverException, TypeError, ValueError):
+            return "loading", 0.0, 0
+        return ready_state, (quiet_ms or 0) / 1000, pending or 0
+
+    def _settled(self, driver, quiet_period: float) -> bool:
+        ready_state, quiet, pending = self._state(driver)
+        return ready_state == "complete" and pending <= 0 and quiet >= quiet_period
+
+    def settle(self, driver, timeout: float = 5.0, quiet_period: float | None = None) -> bool:
+        """
+        Wait until the current document (or frame) has loaded and gone quiet.
+
+        Args:
+            driver: The WebDriver
+            timeout: Maximum seconds to wait
+            quiet_period: Override of the quiet period
+
+        Returns:
+            Whether the page settled before the timeout
+        """
+        quiet_period = self.quiet_period if quiet_period is None else quiet_period
+        deadline = time.monotonic() + timeout
+        self._install(driver)
+        while True:
+            if self._settled(driver, quiet_period):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def is_expected_absent(self, url: str, xpath: str) -> bool:
+        key = (url_pattern(url), xpath)
+        with self._lock:
+            until = self._absent.get(key)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._absent[key]
+                return False
+            return True
+
+    def _remember(self, url: str, xpath: str, absent: bool) -> None:
+        key = (url_pattern(url), xpath)
+        with self._lock:
+            if not absent:
+                self._absent.pop(key, None)
+                self._misses.pop(key, None)
+                return
+            misses = self._misses.setdefault(key, set())
+            misses.add(url)
+            if len(misses) >= self.absent_after:
+                del self._misses[key]
+                self._absent[key] = time.monotonic() + self.absent_ttl
+
+    def wait_for(self, driver, xpath: str, timeout: float = 10.0) -> List:
+        """
+        Wait for elements matching ``xpath`` to be present.
+
+        Returns early, with no elements, once the page has settled without
+        them. If the selector is known to be missing on pages shaped like the
+        current one, it is checked once the document has loaded, and not
+        waited for; such a check doesn't extend the memory.
+
+        Args:
+            driver: The WebDriver
+            xpath: The selector
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The matching elements, or an empty list
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            url = driver.current_url
+        except WebDriverException:
+            url = ""
+        expected_absent = self.is_expected_absent(url, xpath)
+        self._install(driver)
+
+        while True:
+            try:
+                elements = driver.find_elements(By.XPATH, xpath)
+            except WebDriverException:
+                elements = []
+            if elements:
+                if expected_absent:
+                    self._remember(url, xpath, absent=False)
+                return elements
+
+            ready_state, quiet, pending = self._state(driver)
+            loaded = ready_state == "complete"
+            if loaded and expected_absent:
+                return []
+            if loaded and pending <= 0 and quiet >= self.quiet_period:
+                self._remember(url, xpath, absent=True)
+                return []
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(self.poll_interval)
@@ -0,0 +1,244 @@
+"""
+Concurrent UQload metadata resolution.
+
+Providers collect a list of normalized uqload embed URLs and hand it to the
+shared :class:`UqloadResolver`, which looks them up concurrently under a
+global limit, a per-host limit and a per-call timeout. Lookups are coroutines
+on the shared HTTP client (see `scraping.uqload_info`), not threads, so the
+limits can be raised well past a thread pool's size. Output keeps the input
+order; links that fail are reported alongside the videos that resolved. File
+codes seen before, by any provider, are answered from memory.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from models.uqvideo import UqVideo
+from scraping import metrics
+from scraping.uqload import DEFAULT_MIRRORS, file_code, mirror_urls, video_identity
+from scraping.uqload_info import fetch_video_info
+
+logger = logging.getLogger(__name__)
+
+
+class ResolveResult:
+    """Videos that resolved, in input order, plus the links that did not."""
+
+    def __init__(self, videos: List[UqVideo], failures: List[Tuple[str, Exception]]):
+        self.videos = videos
+        self.failures = failures
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failures)
+
+
+class UqloadResolver:
+    """
+    Resolves uqload embed URLs to :class:`UqVideo` objects with bounded fan-out.
+
+    Videos are identified by file code (see `scraping.uqload`): each code is
+    looked up once, on the link's own host first and on the other mirrors
+    only if that fails, and its metadata is kept for ``info_ttl`` seconds
+    for every provider and media page that links to it.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        per_host: int = 4,
+        timeout: float = 30.0,
+        mirrors: Iterable[str] = DEFAULT_MIRRORS,
+        info_ttl: float = 3600.0,
+        max_infos: int = 4096,
+    ):
+        """
+        Initialize the resolver.
+
+        Args:
+            concurrency: Maximum lookups in flight across all hosts
+            per_host: Maximum lookups in flight against a single host
+            timeout: Seconds allowed for a single lookup
+            mirrors: Uqload hosts tried, in order, when a link's host fails
+            info_ttl: Seconds the metadata of a file code is reused
+            max_infos: File codes whose metadata is kept at most
+        """
+        if concurrency < 1 or per_host < 1:
+            raise ValueError("concurrency and per_host must be at least 1")
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.mirrors = tuple(mirrors)
+        self.info_ttl = info_ttl
+        self.max_infos = max_infos
+        self._lock = threading.Lock()
+        # file code -> (video info, embed URL that resolved, expiry)
+        self._infos: "OrderedDict[str, Tuple[Dict, str, float]]" = OrderedDict()
+        self._stats = {"info_hits": 0, "info_misses": 0, "mirror_fallbacks": 0}
+        # Semaphores and lookups are bound to the event loop that first uses them.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._host_semaphores = {}
+            self._inflight = {}
+
+    def _limits(self, host: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        self._bind_loop()
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = asyncio.Semaphore(self.per_host)
+            self._host_semaphores[host] = host_semaphore
+        return self._semaphore, host_semaphore
+
+    def _cached_info(self, code: str) -> Tuple[Dict, str] | None:
+        with self._lock:
+            cached = self._infos.get(code)
+            if cached is None or cached[2] < time.monotonic():
+                self._infos.pop(code, None)
+                self._stats["info_misses"] += 1
+                return None
+            self._infos.move_to_end(code)
+            self._stats["info_hits"] += 1
+            return cached[0], cached[1]
+
+    def _remember_info(self, code: str, video_info: Dict, url: str) -> None:
+        with self._lock:
+            self._infos[code] = (video_info, url, time.monotonic() + self.info_ttl)
+            self._infos.move_to_end(code)
+            while len(self._infos) > self.max_infos:
+                self._infos.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "infos": len(self._infos)}
+
+    def clear(self) -> None:
+        """Forget the metadata of every file code."""
+        with self._lock:
+            self._infos.clear()
+
+    async def _lookup(self, url: str, provider_name: str) -> Dict:
+        """One lookup of one embed URL, under the limits and the timeout."""
+        host = urllib.parse.urlparse(url).netloc.lower()
+        semaphore, host_semaphore = self._limits(host)
+        async with semaphore, host_semaphore:
+            with metrics.span(provider_name, metrics.UQLOAD_RESOLUTION):
+                return await asyncio.wait_for(fetch_video_info(url), timeout=self.timeout)
+
+    async def _resolve_code(self, url: str, provider_name: str) -> Tuple[Dict, str]:
+        """Look ``url`` up, then its mirrors until one answers."""
+        error: Exception | None = None
+        for attempt, mirror_url in enumerate(mirror_urls(url, self.mirrors)):
+            if attempt:
+                with self._lock:
+                    self._stats["mirror_fallbacks"] += 1
+                logger.info("Retrying %s on mirror %s after %r", url, mirror_url, error)
+            try:
+                return await self._lookup(mirror_url, provider_name), mirror_url
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                error = exc
+        raise error
+
+    async def resolve_one(self, url: str, provider_name: str = "unknown") -> UqVideo:
+        """
+        Resolve a single embed URL, honouring the concurrency limits.
+
+        A file code resolved recently is answered from memory, and
+        concurrent calls for the same code share one lookup. Each lookup is
+        timed as the ``uqload_resolution`` stage of ``provider_name``.
+
+        Raises:
+            asyncio.TimeoutError: If the lookup exceeded ``timeout`` on every mirror
+            Exception: Whatever the underlying lookup raised on the last mirror
+        """
+        code = file_code(url)
+        if code is None:
+            return UqVideo(dict=await self._lookup(url, provider_name), html_url=url)
+
+        cached = self._cached_info(code)
+        if cached is None:
+            self._bind_loop()
+            task = self._inflight.get(code)
+            if task is None:
+                task = asyncio.ensure_future(self._resolve_code(url, provider_name))
+                self._inflight[code] = task
+                task.add_done_callback(lambda done: self._finish_lookup(code, done))
+            cached = await asyncio.shield(task)
+        video_info, resolved_url = cached
+        return UqVideo(dict=video_info, html_url=resolved_url)
+
+    def _finish_lookup(self, code: str, task: asyncio.Task) -> None:
+        if self._inflight.get(code) is task:
+            del self._inflight[code]
+        if task.cancelled() or task.exception() is not None:
+            return
+        video_info, resolved_url = task.result()
+        self._remember_info(code, video_info, resolved_url)
+
+    async def resolve(self, urls: Iterable[str], provider_name: str = "unknown") -> ResolveResult:
+        """
+        Resolve many embed URLs concurrently.
+
+        Args:
+            urls: Normalized uqload embed URLs; links to the same file code
+                are resolved (and returned) once
+            provider_name: Provider the links were found by, for metrics
+
+        Returns:
+            The resolved videos in input order and the failed links
+        """
+        unique: Dict[str, str] = {}
+        for url in urls:
+            unique.setdefault(video_identity(url), url)
+        urls = list(unique.values())
+        outcomes = await asyncio.gather(
+            *(self.resolve_one(url, provider_name) for url in urls), return_exceptions=True
+        )
+
+        videos: List[UqVideo] = []
+        failures: List[Tuple[str, Exception]] = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, BaseException):
+                failures.append((url, outcome))
+                logger.warning("Error fetching video info for %s: %r", url, outcome)
+            else:
+                videos.append(outcome)
+
+        if failures:
+            logger.info(
+                "Resolved %d of %d uqload links (%d failed)",
+                len(videos), len(urls), len(failures),
+            )
+        return ResolveResult(videos, failures)
+
+
+# Global resolver instance
+_global_resolver = UqloadResolver()
+
+
+def get_resolver() -> UqloadResolver:
+    """Get the global resolver instance."""
+    return _global_resolver
+
+
+def configure_resolver(**kwargs) -> UqloadResolver:
+    """Replace the global resolver with one using the given settings (see `UqloadResolver`)."""
+    global _global_resolver
+    _global_resolver = UqloadResolver(**kwargs)
+    return _global_resolver
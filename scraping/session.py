@@ -0,0 +1,72 @@
+"""
+Shared HTTP sessions.
+
+Every provider instance used to open its own ``requests`` session, so each
+one opened and kept alive its own connections to its site.
+:class:`SessionPool` hands out one session per site, each mounted with a
+pooled adapter, and keeps it for the life of the process: provider
+instances of the same site share cookies and keep-alive connections, while
+different sites keep separate sessions. Requests to uqload hosts do not go
+through these sessions; they share the process-wide
+:class:`~scraping.http.AsyncHttpClient`.
+"""
+
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """One pooled ``requests`` session per site."""
+
+    def __init__(self, pool_connections: int = 8, pool_maxsize: int = 16):
+        """
+        Initialize the pool.
+
+        Args:
+            pool_connections: Hosts each session keeps connections to
+            pool_maxsize: Keep-alive connections kept per host
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+
+    def session(self, site: str) -> requests.Session:
+        """The session of ``site``, created on first use."""
+        with self._lock:
+            session = self._sessions.get(site)
+            if session is None:
+                session = self._sessions[site] = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+            return session
+
+    def close(self) -> None:
+        """Close every session; the next call to `session` opens a new one."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Global session pool
+_global_pool = SessionPool()
+
+
+def get_session_pool() -> SessionPool:
+    """Get the global session pool."""
+    return _global_pool
+
+
+def configure_session_pool(**kwargs) -> SessionPool:
+    """Replace the global session pool with one using the given settings (see `SessionPool`)."""
+    global _global_pool
+    _global_pool.close()
+    _global_pool = SessionPool(**kwargs)
+    return _global_pool
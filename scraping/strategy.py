@@ -0,0 +1,190 @@
+"""
+Learned scraping strategies.
+
+Some sites move their search page or change their result markup, so providers
+probe several URL patterns and selectors. :class:`StrategyMemory` records
+which combination last worked for each provider, persists it to a JSON file
+so it survives restarts, and counts attempts and hits per combination. A
+provider tries the learned strategy first and only probes the others when it
+fails.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SearchStrategy:
+    """A search URL template and the selectors that read its results."""
+
+    __slots__ = ("url_template", "item_xpath", "title_xpath")
+
+    def __init__(self, url_template: str, item_xpath: str, title_xpath: str | None = None):
+        # `url_template` contains a "{query}" placeholder
+        self.url_template = url_template
+        self.item_xpath = item_xpath
+        self.title_xpath = title_xpath
+
+    @property
+    def key(self) -> str:
+        return " || ".join((self.url_template, self.item_xpath, self.title_xpath or ""))
+
+    def to_dict(self) -> dict:
+        return {
+            "url_template": self.url_template,
+            "item_xpath": self.item_xpath,
+            "title_xpath": self.title_xpath,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "SearchStrategy":
+        return SearchStrategy(data["url_template"], data["item_xpath"], data.get("title_xpath"))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SearchStrategy) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"SearchStrategy({self.url_template!r}, {self.item_xpath!r}, {self.title_xpath!r})"
+
+
+class StrategyMemory:
+    """
+    Remembers the last successful `SearchStrategy` of each provider, with
+    per-strategy attempt and hit counts.
+    """
+
+    def __init__(self, path: str | None = None):
+        """
+        Initialize the memory.
+
+        Args:
+            path: JSON file the memory is loaded from and saved to
+                (default: memory only)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # provider -> last successful strategy
+        self._learned: Dict[str, SearchStrategy] = {}
+        # provider -> strategy key -> [attempts, hits]
+        self._counts: Dict[str, Dict[str, list]] = {}
+        self._load()
+
+    def learned(self, provider_name: str) -> Optional[SearchStrategy]:
+        """The strategy that last succeeded for ``provider_name``, if any."""
+        with self._lock:
+            return self._learned.get(provider_name)
+
+    def record(self, provider_name: str, strategy: SearchStrategy, success: bool) -> None:
+        """
+        Count an attempt of ``strategy``; a success makes it the one tried first.
+
+        A failure of the learned strategy does not forget it: it stays first
+        until another strategy succeeds.
+        """
+        with self._lock:
+            counts = self._counts.setdefault(provider_name, {}).setdefault(strategy.key, [0, 0])
+            counts[0] += 1
+            if success:
+                counts[1] += 1
+            changed = success and self._learned.get(provider_name) != strategy
+            if success:
+                self._learned[provider_name] = strategy
+        self._save(force=changed)
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per provider, the learned strategy and the attempts, hits and hit
+        rate of every strategy tried.
+        """
+        with self._lock:
+            stats = {}
+            for provider_name in set(self._learned) | set(self._counts):
+                learned = self._learned.get(provider_name)
+                stats[provider_name] = {
+                    "learned": learned.to_dict() if learned else None,
+                    "strategies": {
+                        key: {
+                            "attempts": attempts,
+                            "hits": hits,
+                            "hit_rate": round(hits / attempts, 3) if attempts else 0.0,
+                        }
+                        for key, (attempts, hits) in self._counts.get(provider_name, {}).items()
+                    },
+                }
+            return stats
+
+    def _snapshot(self) -> dict:
+        return {
+            "learned": {name: strategy.to_dict() for name, strategy in self._learned.items()},
+            "counts": {
+                name: {key: list(count) for key, count in counts.items()}
+                for name, counts in self._counts.items()
+            },
+        }
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            learned = {
+                name: SearchStrategy.from_dict(strategy)
+                for name, strategy in data.get("learned", {}).items()
+            }
+            counts = data.get("counts", {})
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Could not load search strategies from %s: %r", self.path, exc)
+            return
+        self._learned = learned
+        self._counts = counts
+
+    def _save(self, force: bool = False) -> None:
+        """Write the memory out. Counts alone are saved every 20 attempts."""
+        if not self.path:
+            return
+        with self._lock:
+            attempts = sum(count[0] for counts in self._counts.values() for count in counts.values())
+            if not force and attempts % 20:
+                return
+            data = self._snapshot()
+
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so readers never see half a file
+            descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=2)
+            os.replace(temporary, self.path)
+        except OSError as exc:
+            logger.warning("Could not save search strategies to %s: %r", self.path, exc)
+
+    def flush(self) -> None:
+        """Save the memory now."""
+        self._save(force=True)
+
+
+# Global strategy memory
+_global_memory = StrategyMemory()
+
+
+def get_strategy_memory() -> StrategyMemory:
+    """Get the global strategy memory."""
+    return _global_memory
+
+
+def configure_strategy_memory(path: str | None = None) -> StrategyMemory:
+    """Replace the global strategy memory with one persisted to ``path``."""
+    global _global_memory
+    _global_memory.flush()
+    _global_memory = StrategyMemory(path)
+    return _global_memory
@@ -0,0 +1,114 @@
+"""
+Streaming video resolution.
+
+:func:`stream_episode_videos` runs an episode crawl on the scraping executor
+and resolves each new uqload link as soon as the episode it was found on has
+been crawled, yielding videos as they resolve instead of after the whole
+season.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Callable, List, Set
+
+from models.uqvideo import UqVideo
+from scraping.crawl import EpisodeResult
+from scraping.executor import run_scraping
+from scraping.resolver import get_resolver
+from scraping.uqload import video_identity
+
+logger = logging.getLogger(__name__)
+
+# Queue marker put once the crawl has finished
+_CRAWL_DONE = object()
+
+
+class CrawlCancelled(Exception):
+    """Raised in the crawl thread once nobody consumes its results anymore."""
+
+
+async def stream_episode_videos(
+    collect: Callable[..., List[str]],
+    normalize: Callable[[str], str | None],
+    url: str,
+    provider_name: str = "unknown",
+) -> AsyncIterator[UqVideo]:
+    """
+    Crawl a media page and yield its videos as they resolve.
+
+    Args:
+        collect: A provider's ``_collect_uqload_links``; called on the
+            scraping executor with an ``on_progress`` callback
+        normalize: Maps a candidate to its canonical link, or None to drop it
+        url: The media page
+        provider_name: Provider the links are found by, for metrics
+
+    Yields:
+        Each video once, in the order they resolve. Links that fail to
+        resolve are logged and skipped; a failing crawl raises after the
+        videos found so far.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    resolver = get_resolver()
+    stopped = threading.Event()
+    seen_videos: Set[str] = set()
+    resolving: Set[asyncio.Task] = set()
+
+    async def resolve(link: str) -> None:
+        try:
+            video = await resolver.resolve_one(link, provider_name)
+        except Exception as exc:
+            logger.warning("Error fetching video info for %s: %r", link, exc)
+            video = None
+        queue.put_nowait(video)
+
+    def schedule(result: EpisodeResult) -> None:
+        # Runs on the event loop, so seen_videos needs no lock
+        for candidate in result.candidates:
+            normalized = normalize(candidate)
+            if not normalized:
+                continue
+            identity = video_identity(normalized)
+            if identity in seen_videos:
+                continue
+            seen_videos.add(identity)
+            resolving.add(loop.create_task(resolve(normalized)))
+
+    def on_progress(result: EpisodeResult) -> None:
+        # Runs on the crawl thread
+        if stopped.is_set():
+            raise CrawlCancelled()
+        loop.call_soon_threadsafe(schedule, result)
+
+    crawl = asyncio.ensure_future(run_scraping(collect, url, on_progress=on_progress))
+    # Progress callbacks are queued on the loop before the crawl's own
+    # completion, so every link is scheduled by the time this marker lands.
+    crawl.add_done_callback(lambda _: queue.put_nowait(_CRAWL_DONE))
+
+    crawl_finished = False
+    received = 0
+    try:
+        while not crawl_finished or received < len(resolving):
+            item = await queue.get()
+            if item is _CRAWL_DONE:
+                crawl_finished = True
+                continue
+            received += 1
+            if item is not None:
+                yield item
+        crawl.result()
+    finally:
+        # The consumer went away (or everything is done): stop the crawl at
+        # its next episode and drop the lookups still running.
+        stopped.set()
+        for task in resolving:
+            task.cancel()
+        if not crawl.done():
+            crawl.add_done_callback(_ignore_cancelled_crawl)
+
+
+def _ignore_cancelled_crawl(crawl: "asyncio.Future") -> None:
+    if not crawl.cancelled() and isinstance(crawl.exception(), CrawlCancelled):
+        logger.debug("Episode crawl stopped: stream closed")
@@ -0,0 +1,98 @@
+"""
+Canonical identity of uqload videos.
+
+The same uqload file is reachable from several mirror domains (``uqload.cx``,
+``.net``, ``.io``, ``.co``), as an embed page, a plain page or a
+``file_code=`` parameter, and often shows up on several sites. Every one of
+those links carries the same file code, so the code is what identifies a
+video: links are deduplicated by :func:`video_identity`, resolved once per
+code, and the other mirrors are only tried when the first one fails.
+"""
+
+import re
+import urllib.parse
+from typing import Iterable, List
+
+# Mirrors tried, in order, when a link's own host fails
+DEFAULT_MIRRORS = ("uqload.cx", "uqload.net", "uqload.io", "uqload.co")
+
+_EMBED_CODE_RE = re.compile(r"/embed-([a-zA-Z0-9]+)\.html", re.IGNORECASE)
+_FILE_CODE_RE = re.compile(r"file_code=([a-zA-Z0-9]+)", re.IGNORECASE)
+# File codes are usually 12 characters, but shorter ones exist
+_PATH_CODE_RE = re.compile(r"/(?:v/)?([a-zA-Z0-9]{8,})(?:\.html)?(?:[?#]|$)")
+
+
+def file_code(link: str) -> str | None:
+    """
+    The uqload file code of a link, or None if it has none.
+
+    Understands ``/embed-<code>.html``, ``file_code=<code>`` and
+    ``/<code>.html`` or ``/v/<code>`` paths.
+    """
+    if not link:
+        return None
+    for pattern in (_EMBED_CODE_RE, _FILE_CODE_RE, _PATH_CODE_RE):
+        match = pattern.search(link)
+        if match:
+            return match.group(1)
+    return None
+
+
+def embed_url(code: str, host: str = DEFAULT_MIRRORS[0], scheme: str = "https") -> str:
+    """The embed page of ``code`` on ``host``."""
+    return f"{scheme}://{host}/embed-{code}.html"
+
+
+def normalize_embed_url(link: str | None) -> str | None:
+    """
+    Normalize a uqload link candidate to an embed URL.
+
+    The link's own uqload host is kept, since that is the mirror the site
+    pointed at; links carried by another host (a ``file_code=`` parameter
+    on a player page) get the first default mirror. Links without a file
+    code are returned cleaned but otherwise unchanged.
+
+    Returns:
+        The embed URL, or None if the link is not a uqload link
+    """
+    if not link:
+        return None
+
+    cleaned = link.strip().strip("'\"")
+    if "uqload" not in cleaned:
+        return None
+
+    code = file_code(cleaned)
+    if code is None:
+        return cleaned
+
+    parsed = urllib.parse.urlparse(cleaned)
+    host = parsed.netloc.lower()
+    if "uqload" not in host:
+        return embed_url(code)
+    return embed_url(code, host, parsed.scheme or "https")
+
+
+def video_identity(link: str) -> str:
+    """The key two links to the same uqload video share: their file code."""
+    code = file_code(link)
+    return f"uqload:{code}" if code else link
+
+
+def mirror_urls(url: str, mirrors: Iterable[str] = DEFAULT_MIRRORS) -> List[str]:
+    """
+    ``url`` followed by the same embed page on each other mirror.
+
+    Links without a file code have no mirrors.
+    """
+    code = file_code(url)
+    if code is None:
+        return [url]
+
+    parsed = urllib.parse.urlparse(url)
+    own_host = parsed.netloc.lower()
+    urls = [url]
+    for host in mirrors:
+        if host != own_host:
+            urls.append(embed_url(code, host, parsed.scheme or "https"))
+    return urls
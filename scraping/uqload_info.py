@@ -0,0 +1,164 @@
+"""
+Native uqload video metadata lookup.
+
+A video's metadata comes from three requests to its uqload host: the embed
+page (direct ``v.mp4`` URL, thumbnail and title), the plain video page
+(cleaner title, resolution and duration, when the host shows them) and a
+``HEAD`` on the video file (size and type). :func:`fetch_video_info` sends
+them through the shared :class:`~scraping.http.AsyncHttpClient`, the two
+pages at once, so a lookup is a coroutine rather than a thread and
+thousands of them fit on one event loop.
+
+The page parsing is kept apart, in :func:`parse_embed_page` and
+:func:`parse_video_page`, and follows what ``uqload_dl`` extracted, so the
+metadata returned is the same.
+"""
+
+import asyncio
+import re
+import urllib.parse
+import uuid
+from typing import Dict
+
+import httpx
+
+from scraping.http import AsyncHttpClient, get_http_client
+from scraping.uqload import embed_url, file_code
+
+# uqload answers the video file only to browser-like requests from its own pages
+_VIDEO_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,"
+        "image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7"
+    ),
+}
+
+_DELETED_MARKER = "File was deleted"
+_VIDEO_URL_RE = re.compile(r"https?://.+/v\.mp4")
+_IMAGE_URL_RE = re.compile(r"https?://.*?\.jpg")
+_EMBED_TITLE_RE = re.compile(r'title:\s*"([^"]+)"')
+_CLASS_RE = re.compile(r"""class\s*=\s*['"]([^'" ]+)['"]""")
+_H1_RE = re.compile(r"<h1[^>]*>(.*?)</h1>", re.DOTALL)
+_TEXTAREA_RE = re.compile(r"<textarea[^>]*>(.*?)</textarea>", re.DOTALL)
+# "[1280x720, 42:13]" in the share code of the video page
+_FORMAT_RE = re.compile(r"\[(\d+x\d+)\, ((\d+:)*\d+)\]")
+_SPECIAL_CHARACTERS_RE = re.compile(r"[^a-zA-Z0-9\s\-\_áéíóúñÁÉÍÓÚÑüÜ]")
+
+
+class VideoNotFound(Exception):
+    """The video was deleted, or its host has no such file code."""
+
+
+def clean_title(title: str) -> str:
+    """``title`` with special characters turned into spaces and whitespace collapsed."""
+    return " ".join(_SPECIAL_CHARACTERS_RE.sub(" ", title).split())
+
+
+def parse_embed_page(html: str) -> Dict[str, str | None]:
+    """
+    The direct video URL, thumbnail and title of an embed page.
+
+    Raises:
+        VideoNotFound: If the page has no video
+    """
+    if _DELETED_MARKER in html:
+        raise VideoNotFound("The video has been deleted or does not exist")
+    video_url = _VIDEO_URL_RE.search(html)
+    if video_url is None:
+        raise VideoNotFound("The video has been deleted or does not exist")
+
+    image_url = _IMAGE_URL_RE.search(html)
+    title = _EMBED_TITLE_RE.search(html)
+    return {
+        "url": video_url.group(0),
+        "image_url": image_url.group(0) if image_url else None,
+        "title": title.group(1) if title else None,
+    }
+
+
+def parse_video_page(html: str) -> Dict[str, str | None]:
+    """
+    The title, resolution and duration a video page shows, each None when
+    missing (error pages show none of them).
+    """
+    info: Dict[str, str | None] = {"title": None, "resolution": None, "duration": None}
+    if "err" in _CLASS_RE.findall(html):
+        return info
+
+    # Sometimes more complete than the embed page's title
+    h1 = _H1_RE.search(html)
+    if h1 is not None:
+        info["title"] = clean_title(h1.group(1)) or None
+
+    for textarea in _TEXTAREA_RE.findall(html):
+        match = _FORMAT_RE.search(textarea)
+        if match:
+            info["resolution"], info["duration"] = match.group(1), match.group(2)
+            break
+    return info
+
+
+async def _get_page(client: AsyncHttpClient, url: str) -> str:
+    response = await client.get(url, follow_redirects=True)
+    if response.status_code != 200:
+        raise ValueError(f"{url} answered {response.status_code}")
+    return response.text
+
+
+async def fetch_video_info(url: str, client: AsyncHttpClient | None = None) -> Dict:
+    """
+    Look up the metadata of an uqload video.
+
+    Args:
+        url: Link to the video: an embed URL, or any link carrying its file code
+        client: HTTP client to send the requests with (default: the global one)
+
+    Returns:
+        A dict with ``url`` (the direct video URL), ``title``, ``image_url``,
+        ``resolution``, ``duration``, ``size`` (bytes) and ``type``, as
+        `models.uqvideo.UqVideo` takes it
+
+    Raises:
+        ValueError: If the link has no file code, or the host answered with an error
+        VideoNotFound: If the video was deleted or does not exist
+        httpx.TransportError: If the host could not be reached
+    """
+    code = file_code(url)
+    if code is None:
+        raise ValueError(f"Not a uqload video link: {url}")
+    client = client or get_http_client()
+    parsed = urllib.parse.urlparse(url)
+    scheme, host = parsed.scheme or "https", parsed.netloc
+
+    embed_html, page_html = await asyncio.gather(
+        _get_page(client, embed_url(code, host, scheme)),
+        _get_page(client, f"{scheme}://{host}/{code}.html"),
+    )
+    info = parse_embed_page(embed_html)
+    page = parse_video_page(page_html)
+
+    video_url = httpx.URL(info["url"])
+    response = await client.request(
+        "HEAD", info["url"], follow_redirects=True,
+        headers={**_VIDEO_HEADERS, "Referer": f"{video_url.scheme}://{video_url.netloc.decode()}"},
+    )
+    if response.status_code != 200:
+        raise ValueError(f"{info['url']} answered {response.status_code}")
+    size = int(response.headers.get("content-length", 0))
+    if not size:
+        raise ValueError(f"{info['url']} has no content length")
+
+    title = clean_title(page["title"] or info["title"] or "")
+    return {
+        "url": info["url"],
+        "title": title or uuid.uuid4().hex,
+        "image_url": info["image_url"],
+        "resolution": page["resolution"],
+        "duration": page["duration"],
+        "size": size,
+        "type": response.headers.get("content-type", ""),
+    }
@@ -0,0 +1,14 @@
+"""
+Unit tests.
+
+They need neither a browser nor the network: drivers are stand-ins and HTTP
+goes to servers started on localhost.
+
+Usage:
+    pytest tests/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,161 @@
+import sqlite3
+import types
+
+import pytest
+
+import cache
+from cache import SQLiteBackend, VideoCache, _serialize
+from models.uqvideo import UqVideo
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freezes the cache's clock; advance it by adding to ``clock.now``."""
+    frozen = types.SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=lambda: frozen.now))
+    return frozen
+
+
+def videos(title="Episode 1"):
+    return [UqVideo({"title": title, "url": f"https://cdn.test/{title}/v.mp4", "size": 1}, "https://uqload.cx/x")]
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    video_cache = VideoCache(max_entries=2)
+    video_cache.set("/a", "P", videos("a"))
+    video_cache.set("/b", "P", videos("b"))
+    assert video_cache.get("/a", "P") is not None
+
+    video_cache.set("/c", "P", videos("c"))
+
+    assert video_cache.get("/b", "P") is None
+    assert video_cache.get("/a", "P") is not None
+    assert video_cache.get("/c", "P") is not None
+    assert video_cache.stats()["evictions"] == 1
+
+
+def test_entries_are_evicted_down_to_max_bytes(clock):
+    size = cache._estimate_size(videos("a"))
+    video_cache = VideoCache(max_bytes=size * 2 + size // 2)
+    for title in ("a", "b", "c"):
+        video_cache.set(f"/{title}", "P", videos(title))
+
+    assert video_cache.get("/a", "P") is None
+    assert video_cache.stats()["bytes"] <= video_cache.max_bytes
+
+
+def test_value_larger_than_max_bytes_is_not_stored(clock):
+    video_cache = VideoCache(max_bytes=10)
+    video_cache.set("/a", "P", videos())
+    assert video_cache.get("/a", "P") is None
+
+
+def test_stale_entry_is_served_until_stale_ttl(clock):
+    video_cache = VideoCache(ttl=60, stale_ttl=30)
+    video_cache.set("/a", "P", videos())
+
+    assert video_cache.get_entry("/a", "P")[1] is False
+    clock.now += 61
+    value, stale = video_cache.get_entry("/a", "P")
+    assert stale and value[0].title == "Episode 1"
+    # `get` only answers fresh entries
+    assert video_cache.get("/a", "P") is None
+
+    clock.now += 30
+    assert video_cache.get_entry("/a", "P") is None
+    stats = video_cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_empty_result_uses_empty_ttl_and_is_never_stale(clock):
+    video_cache = VideoCache(ttl=3600, stale_ttl=600, empty_ttl=300)
+    video_cache.set("/a", "P", [])
+
+    assert video_cache.fresh_for("/a", "P") == 300
+    clock.now += 300
+    assert video_cache.get_entry("/a", "P") is None
+
+
+def test_failure_uses_failure_ttl(clock):
+    video_cache = VideoCache(failure_ttl=60)
+    video_cache.set_failure("/a", "P")
+
+    assert video_cache.get("/a", "P") == []
+    clock.now += 60
+    assert not video_cache.contains("/a", "P")
+
+
+def test_failure_keeps_stale_videos(clock):
+    video_cache = VideoCache(ttl=60, stale_ttl=600, failure_ttl=60)
+    video_cache.set("/a", "P", videos())
+    clock.now += 120
+
+    video_cache.set_failure("/a", "P")
+
+    value, stale = video_cache.get_entry("/a", "P")
+    assert stale and len(value) == 1
+
+
+def test_provider_ttl_override(clock):
+    video_cache = VideoCache(ttl=3600, provider_ttls={"Fast": 60})
+    video_cache.set("/a", "Fast", videos())
+    video_cache.set("/a", "Slow", videos())
+
+    assert video_cache.fresh_for("/a", "Fast") == 60
+    assert video_cache.fresh_for("/a", "Slow") == 3600
+
+
+def test_sqlite_backend_migrates_a_table_without_fresh_until(tmp_path):
+    path = str(tmp_path / "cache.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE video_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO video_cache VALUES (?, ?, ?)", ("old", 4_000_000_000.0, _serialize(videos()))
+    )
+    connection.commit()
+    connection.close()
+
+    backend = SQLiteBackend(path)
+    try:
+        columns = {row[1] for row in backend._connection().execute("PRAGMA table_info(video_cache)")}
+        assert "fresh_until" in columns
+        # Rows from before the migration are fresh until they expire
+        value, expires_at, fresh_until = backend.get("old")
+        assert value[0].title == "Episode 1"
+        assert fresh_until == expires_at == 4_000_000_000.0
+
+        backend.set("new", videos("Episode 2"), 4_000_000_100.0, fresh_until=4_000_000_000.0)
+        assert backend.get("new")[2] == 4_000_000_000.0
+    finally:
+        backend.close()
+
+
+def test_sqlite_backend_skips_rows_it_cannot_decode(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    try:
+        with backend._connection() as connection:
+            connection.execute(
+                "INSERT INTO video_cache VALUES (?, ?, ?, NULL)", ("pickled", 4_000_000_000.0, b"P\x80\x04")
+            )
+        backend.set("good", videos(), 4_000_000_000.0)
+
+        assert backend.get("pickled") is None
+        assert [row[0] for row in backend.load(0, 10)] == ["good"]
+    finally:
+        backend.close()
+
+
+def test_memory_miss_is_answered_from_the_backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    writer = VideoCache(backend=backend)
+    writer.set("/a", "P", videos())
+    writer.flush()
+
+    reader = VideoCache(backend=backend)
+    value, stale = reader.get_entry("/a", "P")
+    assert not stale and value[0].title == "Episode 1"
+    assert reader.warm_load() == 1
+    writer.close()
+    reader.close()
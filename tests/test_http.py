@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraping.http import AsyncHttpClient, _CachingBackend
+
+
+class _Hello(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"hello"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Hello)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://localhost:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport_uses_caching_backend():
+    client = AsyncHttpClient(http2=False)
+    assert isinstance(client._transport()._pool._network_backend, _CachingBackend)
+
+
+def test_connections_resolve_through_dns_cache(server_url):
+    # Keep-alive off, so each request opens a connection of its own
+    client = AsyncHttpClient(http2=False, max_keepalive=0)
+
+    async def fetch_twice():
+        try:
+            for _ in range(2):
+                response = await client.get(server_url)
+                assert response.text == "hello"
+        finally:
+            await client.aclose()
+
+    asyncio.run(fetch_twice())
+    assert client.dns.misses == 1
+    assert client.dns.hits == 1
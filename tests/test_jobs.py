@@ -0,0 +1,53 @@
+import asyncio
+
+from scraping.jobs import DONE, FAILED, PRIORITY_HIGH, PRIORITY_LOW, JobQueue
+
+
+class RecordingProvider:
+    """Answers every media URL with no videos, remembering the order asked."""
+
+    def __init__(self):
+        self.seen = []
+
+    async def get_uqvideos_from_media_url(self, url):
+        self.seen.append(url)
+        await asyncio.sleep(0)
+        return []
+
+
+async def finish(job):
+    return [item async for item in job.completed()]
+
+
+def test_higher_priority_jobs_run_first():
+    provider = RecordingProvider()
+    queue = JobQueue({"recording": provider}, concurrency=1)
+
+    async def run():
+        low = queue.submit([("recording", f"/jobs/low/{n}") for n in range(3)], priority=PRIORITY_LOW)
+        high = queue.submit([("recording", f"/jobs/high/{n}") for n in range(3)], priority=PRIORITY_HIGH)
+        await asyncio.gather(finish(low), finish(high))
+        queue.close()
+        return low, high
+
+    low, high = asyncio.run(run())
+
+    assert provider.seen == [f"/jobs/high/{n}" for n in range(3)] + [f"/jobs/low/{n}" for n in range(3)]
+    assert low.status == high.status == DONE
+
+
+def test_unknown_provider_fails_without_queueing():
+    provider = RecordingProvider()
+    queue = JobQueue({"recording": provider}, concurrency=1)
+
+    async def run():
+        job = queue.submit([("missing", "/jobs/missing"), ("recording", "/jobs/known")])
+        items = await finish(job)
+        queue.close()
+        return job, items
+
+    job, items = asyncio.run(run())
+
+    assert items[0].status == FAILED and "Invalid provider" in items[0].error
+    assert provider.seen == ["/jobs/known"]
+    assert job.to_dict(include_items=False)["counts"] == {"queued": 0, "running": 0, "done": 1, "failed": 1}
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from scraping.pool import DriverPool, PoolTimeout
+
+
+class FakeDriver:
+    """Stands in for a WebDriver: navigates nowhere and remembers being quit."""
+
+    def __init__(self):
+        self.quit_called = False
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("Chrome failed to start")
+            driver = FakeDriver()
+            self.drivers.append(driver)
+            return driver
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_lease_reuses_the_driver_of_the_same_affinity():
+    factory = Factory()
+    pool = DriverPool(factory, min_size=0, max_size=2)
+
+    with pool.lease("a") as first, pool.lease("b") as second:
+        assert first.driver is not second.driver
+        driver_a = first.driver
+    with pool.lease("a") as again:
+        assert again.driver is driver_a
+
+    assert len(factory.drivers) == 2
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 2
+
+
+def test_checkout_times_out_when_every_driver_is_leased():
+    pool = DriverPool(Factory(), min_size=0, max_size=1)
+    lease = pool.checkout()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.checkout(timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    assert pool.stats()["waiting"] == 0
+
+    pool.checkin(lease)
+    pool.checkin(pool.checkout(timeout=0.1))
+
+
+def test_checkin_wakes_a_waiting_checkout():
+    pool = DriverPool(Factory(), min_size=0, max_size=1)
+    lease = pool.checkout()
+    threading.Timer(0.05, pool.checkin, args=(lease,)).start()
+
+    second = pool.checkout(timeout=2)
+    assert second.driver is lease.driver
+
+
+def test_broken_driver_is_quit_and_replenished():
+    factory = Factory()
+    pool = DriverPool(factory, min_size=1, max_size=1)
+    pool.start()
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["created"]) == (1, 1, 1)
+
+    with pool.lease() as lease:
+        broken = lease.driver
+        lease.mark_broken()
+
+    assert broken.quit_called
+    wait_until(lambda: pool.stats()["idle"] == 1)
+    stats = pool.stats()
+    assert (stats["size"], stats["created"], stats["recycled"]) == (1, 2, 1)
+    with pool.lease() as lease:
+        assert lease.driver is not broken
+
+
+def test_driver_is_recycled_after_max_navigations():
+    factory = Factory()
+    pool = DriverPool(factory, min_size=0, max_size=1, max_navigations=2)
+
+    with pool.lease() as lease:
+        lease.navigate("http://example.test/1")
+        lease.navigate("http://example.test/2")
+        worn = lease.driver
+
+    assert worn.quit_called
+    with pool.lease() as lease:
+        assert lease.driver is not worn
+
+
+def test_failed_start_gives_the_slot_back():
+    pool = DriverPool(Factory(failures=1), min_size=0, max_size=1)
+
+    with pytest.raises(RuntimeError):
+        pool.checkout(timeout=0.1)
+    assert pool.stats()["size"] == 0
+    pool.checkin(pool.checkout(timeout=0.1))
+
+
+def test_failed_replenish_is_logged(caplog):
+    pool = DriverPool(Factory(failures=1), min_size=1, max_size=1)
+
+    with caplog.at_level(logging.WARNING, logger="scraping.pool"):
+        pool.start()
+
+    assert "Error starting WebDriver" in caplog.text
+    assert pool.stats()["size"] == 0
+    pool.start()
+    assert pool.stats()["idle"] == 1
+
+
+def test_close_quits_idle_drivers_and_refuses_checkouts():
+    factory = Factory()
+    pool = DriverPool(factory, min_size=0, max_size=2)
+    lease = pool.checkout()
+    pool.checkin(pool.checkout())
+    pool.close()
+
+    assert sum(driver.quit_called for driver in factory.drivers) == 1
+    with pytest.raises(PoolTimeout):
+        pool.checkout(timeout=0.1)
+    # Leased drivers are quit on their way back
+    pool.checkin(lease)
+    assert lease.driver.quit_called
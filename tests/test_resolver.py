@@ -0,0 +1,74 @@
+import asyncio
+import urllib.parse
+
+import pytest
+
+import scraping.resolver
+from scraping.resolver import UqloadResolver
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Stands in for the uqload hosts; hosts in ``down`` fail every lookup."""
+
+    class Hosts:
+        down = set()
+        calls = []
+
+    async def fetch_video_info(url):
+        Hosts.calls.append(url)
+        host = urllib.parse.urlparse(url).netloc
+        if host in Hosts.down:
+            raise ConnectionError(f"{host} is down")
+        return {"url": f"https://{host}/v.mp4", "title": "Episode", "size": 1}
+
+    monkeypatch.setattr(scraping.resolver, "fetch_video_info", fetch_video_info)
+    return Hosts
+
+
+MIRRORS = ("uqload.cx", "uqload.net", "uqload.io")
+
+
+def test_lookup_falls_back_to_the_next_mirror(lookups):
+    lookups.down = {"uqload.cx"}
+    resolver = UqloadResolver(mirrors=MIRRORS)
+
+    video = asyncio.run(resolver.resolve_one("https://uqload.cx/embed-abcdefghijkl.html"))
+
+    assert video.html_url == "https://uqload.net/embed-abcdefghijkl.html"
+    assert video.url == "https://uqload.net/v.mp4"
+    assert resolver.stats()["mirror_fallbacks"] == 1
+
+
+def test_resolved_code_is_answered_from_memory(lookups):
+    lookups.down = {"uqload.cx"}
+    resolver = UqloadResolver(mirrors=MIRRORS)
+
+    async def resolve_twice():
+        await resolver.resolve_one("https://uqload.cx/embed-abcdefghijkl.html")
+        # Any link to the same file code, on any host
+        return await resolver.resolve_one("https://uqload.io/embed-abcdefghijkl.html")
+
+    video = asyncio.run(resolve_twice())
+
+    assert video.html_url == "https://uqload.net/embed-abcdefghijkl.html"
+    assert len(lookups.calls) == 2
+    assert resolver.stats()["info_hits"] == 1
+
+
+def test_code_failing_on_every_mirror_is_reported(lookups):
+    lookups.down = set(MIRRORS)
+    resolver = UqloadResolver(mirrors=MIRRORS)
+
+    result = asyncio.run(resolver.resolve([
+        "https://uqload.cx/embed-abcdefghijkl.html",
+        "https://uqload.cx/embed-mnopqrstuvwx.html",
+    ]))
+
+    assert result.videos == [] and result.partial
+    assert [url for url, _ in result.failures] == [
+        "https://uqload.cx/embed-abcdefghijkl.html",
+        "https://uqload.cx/embed-mnopqrstuvwx.html",
+    ]
+    assert all(isinstance(error, ConnectionError) for _, error in result.failures)
+    assert len(lookups.calls) == 2 * len(MIRRORS)